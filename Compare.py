@@ -1,9 +1,20 @@
 """Bank Comparison Dashboard - Landing Page"""
+import math
+
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 
-from src import config, data_loader, metric_catalog
+from components import charts, insights, selectors
+from src import (
+    config,
+    data_loader,
+    derived_metrics,
+    dimension_index,
+    metadata,
+    metric_catalog,
+    peer_groups,
+    rollups,
+)
 
 st.set_page_config(
     page_title=config.APP_TITLE,
@@ -12,64 +23,50 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Header
-st.title("Compare")
-
-# Load data with spinner
-with st.spinner('Loading data...'):
-    df = data_loader.load_data()
-    if df is None:
-        st.error("⚠️ Failed to load data")
-        st.stop()
-
-# Small data summary
-st.caption(f"{len(df):,} records · {df['NSA'].nunique()} banks · {df['Label'].nunique()} metrics")
 
-# Get available options
-all_banks = data_loader.get_banks()
-all_metrics = data_loader.get_metrics()
-all_periods = data_loader.get_periods()
-
-# Initialize session state
-if 'selected_banks' not in st.session_state:
-    st.session_state.selected_banks = all_banks[:5]
-if 'selected_metrics' not in st.session_state:
-    st.session_state.selected_metrics = all_metrics[:3]
-if 'selected_period' not in st.session_state:
-    st.session_state.selected_period = all_periods[-1]
-if 'bank_colors' not in st.session_state:
-    # Custom color palette
-    colors = ['#002E2E', '#87E0B0', '#C3A8BA', '#295757', '#B0FFD9', '#DBCC9A',
-              '#001414', '#5EB887', '#A2874C', '#485154', '#1C0D0F', '#000000']
-    st.session_state.bank_colors = {
-        bank: colors[i % len(colors)]
-        for i, bank in enumerate(all_banks)
-    }
-if 'selectors_collapsed' not in st.session_state:
-    st.session_state.selectors_collapsed = False
+def _commit_selection(key, value):
+    """Store a selection and rerun the full page if it changed."""
+    if st.session_state[key] != value:
+        st.session_state[key] = value
+        st.rerun()
 
-st.divider()
 
-# Top bar - more compact
-top_cols = st.columns([3, 2, 2])
+def render_peer_group_editor(df, all_banks, all_groups):
+    """Create, replace or delete saved peer groups."""
+    name = st.text_input("Name", key="peer_group_name")
+    kind = st.radio("Members", list(peer_groups.KINDS), format_func=peer_groups.KINDS.get,
+                    horizontal=True, key="peer_group_kind")
+    if kind == 'nsa':
+        members = st.multiselect("Banks", all_banks, key="peer_group_banks")
+    else:
+        members = st.multiselect("Institutions", data_loader.get_unique_values(df, 'LEI_Code'),
+                                 format_func=metadata.get_institution_name, key="peer_group_institutions")
+
+    if st.button("Save group"):
+        try:
+            peer_groups.save_peer_group(name, kind, members)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.rerun()
 
-with top_cols[0]:
-    selected_period = st.selectbox(
-        "📅 Period",
-        all_periods,
-        index=all_periods.index(st.session_state.selected_period) if st.session_state.selected_period in all_periods else len(all_periods)-1,
-        format_func=lambda x: x.strftime('%b %Y') if pd.notna(x) else 'Unknown'
-    )
-    st.session_state.selected_period = selected_period
+    saved_groups = [g for g in all_groups if not peer_groups.is_builtin(g)]
+    if saved_groups:
+        st.divider()
+        group = st.selectbox("Saved groups", saved_groups)
+        if st.button("Delete group"):
+            peer_groups.delete_peer_group(group)
+            st.session_state.selected_peer_groups = [g for g in st.session_state.selected_peer_groups if g != group]
+            st.rerun()
 
-with top_cols[1]:
-    sort_by_value = st.checkbox("📊 Sort by value", value=True)
 
-with top_cols[2]:
-    show_data = st.checkbox("📋 Show data table", value=False)
+@st.fragment
+def render_selectors(df, all_banks, all_items, item_labels):
+    """Bank, metric and dimension selectors.
 
-# Selectors (collapsible)
-if not st.session_state.selectors_collapsed:
+    Runs as a fragment: searching or switching the region filter only reruns
+    the selectors; the page reruns once a selection actually changes.
+    """
     st.markdown("##### 🏦 Banks")
     bank_cols = st.columns([1, 4, 1, 1])
 
@@ -85,7 +82,6 @@ if not st.session_state.selectors_collapsed:
             default=[b for b in st.session_state.selected_banks if b in available_banks] if st.session_state.selected_banks else available_banks[:5],
             label_visibility="collapsed"
         )
-        st.session_state.selected_banks = selected_banks
 
     with bank_cols[2]:
         if st.button("All", width="stretch"):
@@ -107,20 +103,24 @@ if not st.session_state.selectors_collapsed:
             label_visibility="collapsed"
         )
 
-        filtered_metrics = metric_catalog.search_metrics(all_metrics, metric_search) if metric_search else all_metrics
+        # Metrics are selected by Item code; labels are only looked up for search and display
+        if metric_search:
+            matches = set(metric_catalog.search_metrics([item_labels[i] for i in all_items], metric_search))
+            filtered_items = [i for i in all_items if item_labels[i] in matches]
+        else:
+            filtered_items = all_items
 
         selected_metrics = st.multiselect(
             "Metrics",
-            filtered_metrics,
-            default=[m for m in st.session_state.selected_metrics if m in filtered_metrics] if st.session_state.selected_metrics else filtered_metrics[:3],
-            format_func=metric_catalog.get_metric_short_name,
+            filtered_items,
+            default=[m for m in st.session_state.selected_metrics if m in filtered_items] if st.session_state.selected_metrics else filtered_items[:3],
+            format_func=lambda item: metric_catalog.get_metric_short_name(item_labels[item]),
             label_visibility="collapsed"
         )
-        st.session_state.selected_metrics = selected_metrics
 
     with metric_cols[1]:
         if st.button("All ", width="stretch"):
-            st.session_state.selected_metrics = filtered_metrics
+            st.session_state.selected_metrics = filtered_items
             st.rerun()
 
     with metric_cols[2]:
@@ -128,70 +128,176 @@ if not st.session_state.selectors_collapsed:
             st.session_state.selected_metrics = []
             st.rerun()
 
-# Collapse toggle
-collapse_col1, collapse_col2 = st.columns([1, 3])
-with collapse_col1:
-    if st.button("▲ Hide" if not st.session_state.selectors_collapsed else "▼ Show"):
-        st.session_state.selectors_collapsed = not st.session_state.selectors_collapsed
-        st.rerun()
-
-with collapse_col2:
-    if st.session_state.selectors_collapsed:
-        st.caption(f"📊 {len(selected_metrics)} metrics × 🏦 {len(selected_banks)} banks")
+    selected_portfolios = selected_countries = []
+    if dimension_index.has_dimensions(df):
+        st.markdown("##### 🧭 Dimensions")
+        dimension_cols = st.columns(2)
+
+        with dimension_cols[0]:
+            portfolios = data_loader.get_unique_values(df, 'Portfolio')
+            selected_portfolios = st.multiselect(
+                "Portfolio",
+                portfolios,
+                default=[p for p in st.session_state.selected_portfolios if p in portfolios],
+                format_func=metadata.get_portfolio_label,
+                placeholder="All portfolios"
+            )
 
-st.divider()
+        with dimension_cols[1]:
+            countries = data_loader.get_unique_values(df, 'Country')
+            selected_countries = st.multiselect(
+                "Counterparty country",
+                countries,
+                default=[c for c in st.session_state.selected_countries if c in countries],
+                format_func=metadata.get_country_label,
+                placeholder="All countries"
+            )
 
-# Validation
-if not selected_banks or not selected_metrics:
-    st.info("👈 Select banks and metrics to compare")
-    st.stop()
+    st.markdown("##### 👥 Peer groups")
+    peer_cols = st.columns([4, 1, 1])
+    all_groups = peer_groups.get_peer_groups()
 
-# Filter data efficiently using query where possible
-filtered_df = df[
-    (df['NSA'].isin(selected_banks)) &
-    (df['Label'].isin(selected_metrics)) &
-    (df['Period'] == selected_period)
-].copy()  # Create copy to avoid SettingWithCopyWarning
+    with peer_cols[0]:
+        selected_groups = st.multiselect(
+            "Peer groups",
+            list(all_groups),
+            default=[g for g in st.session_state.selected_peer_groups if g in all_groups],
+            placeholder="Benchmark against peer groups",
+            label_visibility="collapsed"
+        )
 
-st.divider()
+    with peer_cols[1]:
+        stats = list(peer_groups.STATS)
+        peer_stat = st.selectbox(
+            "Benchmark",
+            stats,
+            index=stats.index(st.session_state.peer_stat),
+            format_func=peer_groups.STATS.get,
+            label_visibility="collapsed"
+        )
 
-# Chart rendering
-def format_number(val):
-    if val >= 1000000:
-        return f'{val/1000000:.1f}M'
-    elif val >= 1000:
-        return f'{val/1000:.0f}k'
-    return f'{val:.0f}'
+    with peer_cols[2]:
+        with st.popover("Manage", width="stretch"):
+            render_peer_group_editor(df, all_banks, all_groups)
+
+    _commit_selection('selected_banks', selected_banks)
+    _commit_selection('selected_metrics', selected_metrics)
+    _commit_selection('selected_portfolios', selected_portfolios)
+    _commit_selection('selected_countries', selected_countries)
+    _commit_selection('selected_peer_groups', selected_groups)
+    _commit_selection('peer_stat', peer_stat)
+
+
+@st.fragment
+def render_metric_chart(df, item, label, level, period, banks, portfolios, countries, default_sort, eu_total,
+                        height, benchmarks, animate=False):
+    """One metric's chart; its sort toggle only reruns this chart.
+
+    With ``animate`` every period is sent with the chart and switched by its
+    slider in the browser; ``benchmarks`` are then given per period.
+    """
+    header_cols = st.columns([5, 1])
+    with header_cols[0]:
+        # Compact metric header
+        st.markdown(f"##### {metric_catalog.get_metric_short_name(label)}")
+    with header_cols[1]:
+        sort_by_value = st.toggle("↕", value=default_sort, key=f"sort_{item}_{default_sort}",
+                                  help="Sort by value")
+
+    if eu_total is not None:
+        period_note = f" ({period.strftime('%b %Y')})" if animate else ""
+        st.caption(f"EU total{period_note}: {charts.format_metric_value(item, eu_total)}")
+
+    get_chart = charts.get_metric_animation if animate else charts.get_metric_chart
+    bank_values, fig = get_chart(
+        df, level, item, period, banks, sort_by_value, st.session_state.bank_colors, height,
+        portfolios, countries, benchmarks
+    )
+    if fig is None:
+        st.caption("No data for the selected banks")
+        return
+
+    st.plotly_chart(fig, width="stretch", key=f"chart_{item}")
+
+    # Data table toggle - more compact
+    with st.expander("📊 Data Table"):
+        table_df = bank_values[['Name', 'Amount']].rename(columns={'Name': 'Bank'})
+        amount_format = config.PERCENTAGE_FORMAT if derived_metrics.is_derived(item) else config.AMOUNT_FORMAT
+        table_df['Amount'] = table_df['Amount'].apply(amount_format.format)
+        st.dataframe(table_df, hide_index=True, width="stretch", height=200)
+
+
+@st.fragment
+def render_data_table(df, banks, items, period, portfolios, countries):
+    """Full data table for the selection; toggling it only reruns this section."""
+    if not st.checkbox("📋 Show data table", value=False):
+        return
+
+    filtered_df = data_loader.filter_data(
+        df,
+        banks=banks,
+        periods=[period],
+        items=items,
+        portfolios=portfolios,
+        countries=countries
+    )
+    display_df = filtered_df[['NSA', 'Label', 'Amount']].copy()
+    display_df['Label'] = display_df['Label'].apply(metric_catalog.get_metric_short_name)
+    st.dataframe(display_df, width='stretch', height=300)
 
-# Determine layout: 1 or 2 columns based on number of banks
-num_banks = len(selected_banks)
-use_two_columns = num_banks <= 8  # Use 2 columns if 8 or fewer banks
 
-chart_idx = 0
-cols = None
+@st.fragment
+def render_chart_grid(df, items, item_labels, level, period, banks, portfolios, countries, default_sort,
+                      groups, peer_stat, animate=False):
+    """Charts for one page of the selected metrics.
+
+    Only the visible page is computed and sent; switching pages reruns just
+    this grid. Selected peer groups are drawn as benchmark lines. With
+    ``animate`` the charts carry every period, selected in the browser.
+    """
+    page_count = math.ceil(len(items) / config.CHARTS_PER_PAGE)
+    page = 1
+    if page_count > 1:
+        page_cols = st.columns([2, 5])
+        with page_cols[0]:
+            page = st.selectbox(
+                "Page",
+                range(1, page_count + 1),
+                format_func=lambda p: f"Page {p} of {page_count}",
+                key=f"chart_page_{len(items)}",
+                label_visibility="collapsed"
+            )
+        with page_cols[1]:
+            first = (page - 1) * config.CHARTS_PER_PAGE
+            st.caption(f"Metrics {first + 1}–{min(first + config.CHARTS_PER_PAGE, len(items))} of {len(items)}")
 
-# Render charts with progress
-progress_bar = st.progress(0)
-total_metrics = len(selected_metrics)
+    page_items = items[(page - 1) * config.CHARTS_PER_PAGE:page * config.CHARTS_PER_PAGE]
 
-for metric_idx, metric in enumerate(selected_metrics):
-    metric_data = filtered_df[filtered_df['Label'] == metric]
+    # Precomputed rollups for the selected level (one grouped pass per dataset version),
+    # in every period when animating
+    level_values = rollups.get_level_values(df, level, banks, page_items, None if animate else period,
+                                            portfolios, countries)
+    eu_totals = rollups.get_level_values(df, 'eu', banks, page_items, period, portfolios, countries)
+    eu_totals = dict(zip(eu_totals['Item'].tolist(), eu_totals['Amount'].tolist(), strict=True))
 
-    if metric_data.empty:
-        continue
+    if level_values.empty:
+        st.info("No data for the selected metrics on this page")
+        return
 
-    bank_values = metric_data.groupby('NSA', observed=True)['Amount'].sum().reset_index()
-    bank_values = bank_values.rename(columns={'NSA': 'Bank'})
+    if groups and level not in peer_groups.BENCHMARK_LEVELS:
+        st.caption("Peer group benchmarks are shown at country and institution level")
 
-    if not bank_values.empty:
-        if sort_by_value:
-            bank_values = bank_values.sort_values('Amount', ascending=False)
-        else:
-            bank_values = bank_values.sort_values('Bank')
+    # Determine layout: 1 or 2 columns based on number of bars per chart
+    num_banks = level_values['Entity'].nunique()
+    use_two_columns = num_banks <= 8  # Use 2 columns if 8 or fewer banks
+    chart_height = charts.get_chart_height(num_banks)
 
-        # Calculate average for reference line
-        avg_value = bank_values['Amount'].mean()
+    # Each chart is its own fragment, memoized per (metric, period, banks, sort order)
+    reported = set(level_values['Item'].tolist())
+    reported_items = [i for i in page_items if i in reported]
+    cols = None
 
+    for chart_idx, item in enumerate(reported_items):
         # Determine column placement
         if use_two_columns:
             if chart_idx % 2 == 0:
@@ -201,72 +307,134 @@ for metric_idx, metric in enumerate(selected_metrics):
             col = st.container()
 
         with col:
-            # Compact metric header
-            st.markdown(f"##### {metric_catalog.get_metric_short_name(metric)}")
-
-            # Map colors
-            bank_values['Color'] = bank_values['Bank'].map(st.session_state.bank_colors).astype(object).fillna('#808080')
-
-            # Calculate dynamic height - more compact
-            chart_height = max(180, min(350, num_banks * 25 + 60))
-
-            # Chart with average line
-            fig = go.Figure()
-
-            # Add bars with improved styling
-            fig.add_trace(go.Bar(
-                x=bank_values['Bank'],
-                y=bank_values['Amount'],
-                marker_color=bank_values['Color'],
-                marker_line_width=0,
-                text=[format_number(v) for v in bank_values['Amount']],
-                textposition='outside',
-                textfont={'size': 10},
-                hovertemplate='<b>%{x}</b><br>%{y:,.0f}<extra></extra>',
-                showlegend=False
-            ))
-
-            # Add average line - more subtle
-            fig.add_trace(go.Scatter(
-                x=bank_values['Bank'],
-                y=[avg_value] * len(bank_values),
-                mode='lines',
-                line={'color': 'rgba(150,150,150,0.5)', 'width': 1, 'dash': 'dash'},
-                name='Average',
-                hovertemplate=f'Avg: {format_number(avg_value)}<extra></extra>',
-                showlegend=False
-            ))
-
-            fig.update_layout(
-                height=chart_height,
-                xaxis_title="",
-                yaxis_title="",
-                yaxis={'rangemode': 'tozero', 'gridcolor': 'rgba(200,200,200,0.2)'},
-                plot_bgcolor='rgba(0,0,0,0)',
-                font={'size': 10},
-                margin={'t': 5, 'b': 25, 'l': 35, 'r': 5},
-                hoverlabel={'bgcolor': 'white', 'font_size': 12}
+            # Benchmarks use the same Portfolio and Country filters as the bars
+            if animate:
+                benchmarks = peer_groups.get_benchmarks_by_period(df, groups, level, item, peer_stat,
+                                                                  portfolios, countries)
+            else:
+                benchmarks = peer_groups.get_benchmarks(df, groups, level, item, period, peer_stat,
+                                                        portfolios, countries)
+            render_metric_chart(
+                df, item, item_labels[item], level, period, banks, portfolios, countries,
+                default_sort, eu_totals.get(item), chart_height, benchmarks, animate
             )
 
-            st.plotly_chart(fig, width="stretch", key=f"chart_{chart_idx}")
 
-            # Data table toggle - more compact
-            with st.expander("📊 Data Table"):
-                table_df = bank_values[['Bank', 'Amount']].copy()
-                table_df['Amount'] = table_df['Amount'].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(table_df, hide_index=True, width="stretch", height=200)
+# Header
+st.title("Compare")
+
+dataset = selectors.render_dataset_selector()
+
+# Load data with spinner
+with st.spinner('Loading data...'):
+    df = data_loader.load_data(dataset)
+    if df is None:
+        st.error("⚠️ Failed to load data")
+        st.stop()
+
+# Small data summary
+all_banks = data_loader.get_banks(dataset)
+all_items = data_loader.get_items(dataset)
+all_periods = data_loader.get_periods(dataset)
+st.caption(f"{len(df):,} records · {len(all_banks)} banks · {len(all_items)} metrics")
+
+# Metrics are handled as Item codes; derived ratios are offered after the raw metrics
+all_items = all_items + derived_metrics.get_available_items(df)
+item_labels = data_loader.get_item_labels(df)
+
+# Initialize session state
+if 'selected_banks' not in st.session_state:
+    st.session_state.selected_banks = all_banks[:5]
+if 'selected_metrics' not in st.session_state:
+    st.session_state.selected_metrics = all_items[:3]
+if 'selected_period' not in st.session_state:
+    st.session_state.selected_period = all_periods[-1]
+if 'bank_colors' not in st.session_state:
+    st.session_state.bank_colors = charts.get_bank_colors(all_banks)
+if 'selectors_collapsed' not in st.session_state:
+    st.session_state.selectors_collapsed = False
+if 'selected_portfolios' not in st.session_state:
+    st.session_state.selected_portfolios = []
+if 'selected_countries' not in st.session_state:
+    st.session_state.selected_countries = []
+if 'selected_peer_groups' not in st.session_state:
+    st.session_state.selected_peer_groups = []
+if 'peer_stat' not in st.session_state:
+    st.session_state.peer_stat = 'Mean'
+
+st.divider()
+
+# Top bar - more compact
+top_cols = st.columns([3, 2, 2])
+
+with top_cols[0]:
+    selected_period = st.selectbox(
+        "📅 Period",
+        all_periods,
+        index=all_periods.index(st.session_state.selected_period) if st.session_state.selected_period in all_periods else len(all_periods)-1,
+        format_func=lambda x: x.strftime('%b %Y') if pd.notna(x) else 'Unknown'
+    )
+    st.session_state.selected_period = selected_period
 
-        chart_idx += 1
+with top_cols[1]:
+    sort_by_value = st.checkbox("📊 Sort by value", value=True)
+    animate_periods = st.checkbox(
+        "▶ All periods", value=False,
+        help="Send every period with the charts and switch between them with a slider, without reloading"
+    )
+
+with top_cols[2]:
+    level = st.selectbox(
+        "🔎 Level",
+        ['country', 'institution', 'region'],
+        format_func=rollups.LEVEL_LABELS.get,
+        label_visibility="collapsed"
+    )
+
+# Selectors (collapsible)
+if not st.session_state.selectors_collapsed:
+    render_selectors(df, all_banks, all_items, item_labels)
+
+selected_banks = st.session_state.selected_banks
+selected_metrics = st.session_state.selected_metrics
+
+# Collapse toggle
+collapse_col1, collapse_col2 = st.columns([1, 3])
+with collapse_col1:
+    if st.button("▲ Hide" if not st.session_state.selectors_collapsed else "▼ Show"):
+        st.session_state.selectors_collapsed = not st.session_state.selectors_collapsed
+        st.rerun()
+
+with collapse_col2:
+    if st.session_state.selectors_collapsed:
+        st.caption(f"📊 {len(selected_metrics)} metrics × 🏦 {len(selected_banks)} banks")
+
+st.divider()
+
+# Validation
+if not selected_banks or not selected_metrics:
+    st.info("👈 Select banks and metrics to compare")
+    st.stop()
+
+has_dimensions = dimension_index.has_dimensions(df)
+selected_portfolios = st.session_state.selected_portfolios if has_dimensions else []
+selected_countries = st.session_state.selected_countries if has_dimensions else []
+
+# Insights work on metric labels; they run in the background while the charts render
+selected_labels = [item_labels[i] for i in selected_metrics if i in item_labels]
+insights.start_insights(df, selected_banks, selected_labels, selected_period)
 
-        # Update progress
-        progress_bar.progress((metric_idx + 1) / total_metrics)
+# Benchmark lines for the selected peer groups
+all_groups = peer_groups.get_peer_groups()
+selected_groups = {name: all_groups[name] for name in st.session_state.selected_peer_groups if name in all_groups}
 
-# Clear progress bar
-progress_bar.empty()
+render_chart_grid(df, selected_metrics, item_labels, level, selected_period, selected_banks,
+                  selected_portfolios, selected_countries, sort_by_value,
+                  selected_groups, st.session_state.peer_stat, animate_periods)
+
+st.divider()
+insights.render_insights_section(df, selected_banks, selected_labels, selected_period)
 
 # Full data table
-if show_data:
-    st.divider()
-    display_df = filtered_df[['NSA', 'Label', 'Amount']].copy()
-    display_df['Label'] = display_df['Label'].apply(metric_catalog.get_metric_short_name)
-    st.dataframe(display_df, width='stretch', height=300)
+st.divider()
+render_data_table(df, selected_banks, selected_metrics, selected_period, selected_portfolios, selected_countries)
@@ -0,0 +1,320 @@
+"""Local JSON API over the catalog getters and comparison functions.
+
+Serves the same numbers as the Compare page without loading the dashboard:
+
+    python api.py --port 8502
+    curl "http://127.0.0.1:8502/statistics?banks=AT&banks=DE&metric=2521302&period=2025-06"
+
+Metrics are given by Item code or by their exact label as listed by
+/metrics. List parameters are passed by repeating the key (metric labels
+may contain commas). Responses carry an ETag derived from the dataset
+version and the request, so repeated requests are answered from cache or
+with 304.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src import config, data_loader, data_processor, derived_metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class ApiError(Exception):
+    """Error returned to the client as a JSON body with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """Bounded LRU cache of encoded responses keyed by ETag."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag):
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+            return body
+
+    def put(self, etag, body):
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _to_json(value):
+    """Convert results (frames, series, numpy scalars, timestamps) to JSON-safe values."""
+    if isinstance(value, pd.DataFrame):
+        return {
+            'index': [_to_json(v) for v in value.index],
+            'columns': [_to_json(v) for v in value.columns],
+            'data': [[_to_json(v) for v in row] for row in value.itertuples(index=False)],
+        }
+    if isinstance(value, pd.Series):
+        return {_to_json(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [_to_json(v) for v in value]
+    if isinstance(value, pd.Timestamp | np.datetime64):
+        return pd.Timestamp(value).strftime('%Y-%m')
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _etag_matches(if_none_match, etag):
+    """Check an If-None-Match header (a list of tags, weak or not, or *) against an ETag."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag.removeprefix('W/') for tag in tags)
+
+
+def _parse_period(value):
+    """Parse a period given as YYYYMM, YYYY-MM or YYYY-MM-DD."""
+    try:
+        if value.isdigit() and len(value) == 6:
+            return pd.Timestamp(year=int(value[:4]), month=int(value[4:]), day=1)
+        return pd.Timestamp(value)
+    except ValueError as e:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid period: {value}") from e
+
+
+class Request:
+    """Query parameters of one API call."""
+
+    def __init__(self, query):
+        self.params = parse_qs(query, keep_blank_values=False)
+
+    def one(self, name, default=None, required=True):
+        values = self.params.get(name)
+        if not values:
+            if required and default is None:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Missing parameter: {name}")
+            return default
+        return values[-1]
+
+    def many(self, name, required=True):
+        values = self.params.get(name, [])
+        if required and not values:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Missing parameter: {name}")
+        return values
+
+    def period(self, name='period', required=True):
+        value = self.one(name, required=required)
+        return _parse_period(value) if value is not None else None
+
+    def positive_int(self, name, default):
+        value = self.one(name, default=str(default))
+        try:
+            number = int(value)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {value}") from e
+        if number < 1:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {value}")
+        return number
+
+    def items(self, df, name='metrics'):
+        """Resolve metrics, given as Item codes or exact labels, to the Item codes the queries run on.
+
+        Derived ratios have no rows of their own, so the comparison queries
+        cannot answer them and they are rejected.
+        """
+        values = self.many(name)
+        labels = data_loader.get_item_labels(df)
+        codes = {label: item for item, label in labels.items()}
+        items = [int(v) if v.isdigit() and int(v) in labels else codes.get(v) for v in values]
+        unknown = [value for value, item in zip(values, items, strict=True) if item is None]
+        if unknown:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown metric in: {unknown}")
+        derived = [value for value, item in zip(values, items, strict=True) if derived_metrics.is_derived(item)]
+        if derived:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Derived metrics are not available from the API: {derived}")
+        return items
+
+    def item(self, df, name='metric'):
+        return self.items(df, name)[-1]
+
+
+def _item_labels(df, result, column=None):
+    """Replace Item codes in a result by metric labels, for the response."""
+    labels = data_loader.get_item_labels(df)
+    if isinstance(result, dict):
+        return {key: sorted(labels.get(item, str(item)) for item in items) for key, items in result.items()}
+    if column is None:
+        return result.rename(index=labels).rename_axis('Label')
+    return result.assign(**{column: result[column].map(labels)}).rename(columns={column: 'Metric'})
+
+
+# Endpoint -> handler(df, dataset, request)
+ENDPOINTS = {
+    '/datasets': lambda df, dataset, r: {
+        name: data_loader.get_dataset_title(name) for name in data_loader.get_datasets()
+    },
+    '/banks': lambda df, dataset, r: data_loader.get_banks(dataset),
+    '/periods': lambda df, dataset, r: data_loader.get_periods(dataset),
+    '/metrics': lambda df, dataset, r: data_loader.get_metrics(dataset),
+    '/sheets': lambda df, dataset, r: data_loader.get_sheets(dataset),
+    '/metrics-by-category': lambda df, dataset, r: _item_labels(
+        df, data_processor.get_metrics_by_category(df)
+    ),
+    '/comparison': lambda df, dataset, r: data_processor.prepare_comparison_data(
+        df, r.many('banks'), r.item(df), [_parse_period(p) for p in r.many('periods', required=False)]
+    ),
+    '/metric-comparison': lambda df, dataset, r: _item_labels(df, data_processor.prepare_metric_comparison_data(
+        df, r.one('bank'), r.items(df), r.period(required=False)
+    ), column='Item'),
+    '/period-change': lambda df, dataset, r: data_processor.calculate_period_change(
+        df, r.many('banks'), r.item(df)
+    ),
+    '/top-banks': lambda df, dataset, r: data_processor.get_top_banks(
+        df, r.item(df), r.period(), r.positive_int('n', default=10)
+    ),
+    '/statistics': lambda df, dataset, r: data_processor.calculate_statistics(
+        df, r.many('banks'), r.item(df), r.period()
+    ),
+    '/heatmap': lambda df, dataset, r: _item_labels(df, data_processor.prepare_heatmap_data(
+        df, r.many('banks'), r.items(df), r.period()
+    )),
+}
+
+
+class ApiServer:
+    """Asyncio HTTP/1.1 server answering GET requests with JSON."""
+
+    def __init__(self, host=config.API_HOST, port=config.API_PORT):
+        self.host = host
+        self.port = port
+        self.cache = ResponseCache(config.API_CACHE_SIZE)
+
+    def _etag(self, dataset, version, path, query):
+        """Build an ETag from the dataset version and the normalized request."""
+        normalized = sorted((k, sorted(v)) for k, v in parse_qs(query).items())
+        key = json.dumps([dataset, version, path, normalized])
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    async def _respond(self, path, query, if_none_match):
+        """Resolve a request to (status, body, etag)."""
+        if path not in ENDPOINTS:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+
+        request = Request(query)
+        dataset = request.one('dataset', default=config.DEFAULT_DATASET)
+        if dataset not in data_loader.get_datasets():
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown dataset: {dataset}")
+
+        # Loading is shared by all requests; only the first one pays for it
+        try:
+            df = await asyncio.to_thread(data_loader.get_dataset, dataset)
+        except Exception as e:
+            logger.exception("Failed to load dataset %s", dataset)
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, f"Failed to load data: {e}") from e
+
+        etag = self._etag(dataset, data_loader.dataset_version(df), path, query)
+        if _etag_matches(if_none_match, etag):
+            return HTTPStatus.NOT_MODIFIED, b'', etag
+
+        body = self.cache.get(etag)
+        if body is None:
+            result = await asyncio.to_thread(ENDPOINTS[path], df, dataset, request)
+            body = json.dumps(_to_json(result)).encode('utf-8')
+            self.cache.put(etag, body)
+
+        return HTTPStatus.OK, body, etag
+
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                method, target, version = (lines[0].split(' ') + ['', '', ''])[:3]
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                url = urlsplit(target)
+                etag = None
+                try:
+                    if method not in ('GET', 'HEAD'):
+                        raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method not allowed: {method}")
+                    status, body, etag = await self._respond(url.path, url.query, headers.get('if-none-match'))
+                except ApiError as e:
+                    status, body = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+                except Exception as e:
+                    status, body = HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': str(e)}).encode('utf-8')
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                response = [
+                    f"HTTP/1.1 {status.value} {status.phrase}",
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(body)}",
+                    "Cache-Control: no-cache",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                if etag:
+                    response.append(f"ETag: {etag}")
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                            limit=MAX_HEADER_BYTES)
+        print(f"Serving transparency API on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Run the JSON API server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        asyncio.run(ApiServer(args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
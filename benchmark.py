@@ -0,0 +1,104 @@
+"""Parity check and benchmark of the DuckDB query backend against pandas.
+
+Runs every ``data_processor`` query on a synthetic dataset with the shape
+of tr_cre, once with pandas on the frame and once with DuckDB on the same
+data as a Parquet file, and prints both timings and whether the results
+match:
+
+    python benchmark.py             # 5,000,000 rows
+    python benchmark.py 20000000
+
+Requires the ``duckdb`` extra.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import config, data_processor, duckdb_backend
+
+
+def synthetic_data(rows, seed=0):
+    """Generate a dataset with the shape of tr_cre for parity checks and benchmarks."""
+    rng = np.random.default_rng(seed)
+    banks = sorted({nsa for region in config.BANK_REGIONS.values() for nsa in region})
+    items = np.arange(2520501, 2520501 + 89, dtype='int64')
+    periods = pd.to_datetime(['2024-09-01', '2024-12-01', '2025-03-01', '2025-06-01'])
+
+    return pd.DataFrame({
+        'NSA': pd.Categorical.from_codes(rng.integers(0, len(banks), rows), banks),
+        'Item': items[rng.integers(0, len(items), rows)],
+        'Period': periods[rng.integers(0, len(periods), rows)],
+        'Amount': rng.gamma(2.0, 5000.0, rows).astype('float32'),
+    })
+
+
+def same_result(expected, actual):
+    """Compare pandas and DuckDB results, ignoring dtypes and float32 rounding."""
+    if isinstance(expected, dict):
+        return all(np.isclose(expected[k], actual[k], rtol=1e-4, equal_nan=True) for k in expected)
+    if isinstance(expected, list):
+        return expected == actual
+    expected = expected.reset_index(drop=expected.index.name is None)
+    actual = actual.reset_index(drop=actual.index.name is None)
+    expected.columns = [str(c) for c in expected.columns]
+    actual.columns = [str(c) for c in actual.columns]
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    for column in expected.columns:
+        left, right = expected[column], actual[column]
+        if pd.api.types.is_numeric_dtype(left):
+            if not np.allclose(left.astype(float), right.astype(float), rtol=1e-4, equal_nan=True):
+                return False
+        elif not (left.astype(str).values == right.astype(str).values).all():
+            return False
+    return True
+
+
+def run_benchmark(rows=5_000_000):
+    """Check parity with the pandas implementation and time both backends."""
+    print(f"Generating {rows:,} synthetic rows...")
+    df = synthetic_data(rows)
+    banks = sorted(df['NSA'].cat.categories)[:10]
+    metrics = sorted(df['Item'].unique().tolist())[:10]
+    period = df['Period'].max()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = Path(tmp) / 'synthetic.parquet'
+        df.assign(Period=df['Period'].dt.strftime('%Y%m').astype('int32')).to_parquet(parquet_path, index=False)
+
+        cases = {
+            'prepare_comparison_data': (banks, metrics[0]),
+            'prepare_metric_comparison_data': (banks[0], metrics),
+            'calculate_period_change': (banks, metrics[0]),
+            'get_top_banks': (metrics[0], period),
+            'calculate_statistics': (banks, metrics[0], period),
+            'prepare_heatmap_data': (banks, metrics, period),
+        }
+
+        backend = config.QUERY_BACKEND
+        config.QUERY_BACKEND = 'pandas'
+
+        print(f"\n{'Function':<34}{'pandas':>10}{'duckdb':>10}{'speedup':>10}  parity")
+        for name, args in cases.items():
+            start = time.perf_counter()
+            expected = getattr(data_processor, name)(df, *args)
+            pandas_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = getattr(duckdb_backend, name)(parquet_path, *args)
+            duckdb_time = time.perf_counter() - start
+
+            print(f"{name:<34}{pandas_time:>9.3f}s{duckdb_time:>9.3f}s"
+                  f"{pandas_time / duckdb_time:>9.1f}x  {'ok' if same_result(expected, actual) else 'MISMATCH'}")
+
+        config.QUERY_BACKEND = backend
+
+
+if __name__ == '__main__':
+    if not duckdb_backend.is_available():
+        sys.exit("duckdb is not installed: pip install duckdb")
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
@@ -0,0 +1,278 @@
+"""Chart building shared by the Compare page and batch reports."""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from src import config, data_loader, derived_metrics, rollups
+
+# Custom color palette
+BANK_PALETTE = ['#002E2E', '#87E0B0', '#C3A8BA', '#295757', '#B0FFD9', '#DBCC9A',
+                '#001414', '#5EB887', '#A2874C', '#485154', '#1C0D0F', '#000000']
+
+
+def get_bank_colors(banks):
+    """Assign a consistent color to each bank."""
+    return {bank: BANK_PALETTE[i % len(BANK_PALETTE)] for i, bank in enumerate(banks)}
+
+
+def format_number(val):
+    """Format an amount compactly (e.g. 1.2M, 350k)."""
+    if val >= 1000000:
+        return f'{val/1000000:.1f}M'
+    elif val >= 1000:
+        return f'{val/1000:.0f}k'
+    return f'{val:.0f}'
+
+
+def format_metric_value(item, val):
+    """Format a metric's value: derived ratios as percentages, amounts compactly."""
+    if derived_metrics.is_derived(item):
+        return config.PERCENTAGE_FORMAT.format(val)
+    return format_number(val)
+
+
+def get_chart_height(num_bars):
+    """Calculate dynamic chart height - more compact."""
+    return max(180, min(350, num_bars * 25 + 60))
+
+
+def prepare_bar_values(metric_data, level, bank_colors, sort_by_value=True):
+    """Turn rollup rows for one metric into bar values with colors and display names."""
+    bank_values = metric_data[['Entity', 'Parent', 'Amount']].rename(columns={'Entity': 'Bank'})
+
+    if sort_by_value:
+        bank_values = bank_values.sort_values('Amount', ascending=False)
+    else:
+        bank_values = bank_values.sort_values('Bank')
+
+    # Map colors (institutions take their country's color)
+    color_map = rollups.get_region_colors() if level == 'region' else bank_colors
+    color_keys = bank_values['Parent'] if level == 'institution' else bank_values['Bank']
+    bank_values['Color'] = color_keys.map(color_map).astype(object).fillna('#808080')
+    bank_values['Name'] = [rollups.get_entity_display_name(level, b) for b in bank_values['Bank']]
+
+    return bank_values
+
+
+def _metric_traces(bank_values, percent=False, benchmarks=()):
+    """Bars plus reference lines (peer groups, else the average) for one metric."""
+    format_value = config.PERCENTAGE_FORMAT.format if percent else format_number
+    hover_value = '%{y:.2f}%' if percent else '%{y:,.0f}'
+
+    # Add bars with improved styling
+    traces = [go.Bar(
+        x=bank_values['Name'],
+        y=bank_values['Amount'],
+        marker_color=bank_values['Color'],
+        marker_line_width=0,
+        text=[format_value(v) if pd.notna(v) else '' for v in bank_values['Amount']],
+        textposition='outside',
+        textfont={'size': 10},
+        hovertemplate=f'<b>%{{x}}</b><br>{hover_value}<extra></extra>',
+        showlegend=False
+    )]
+
+    if benchmarks:
+        # One line per peer group
+        for i, (name, value) in enumerate(benchmarks):
+            traces.append(go.Scatter(
+                x=bank_values['Name'],
+                y=[value] * len(bank_values),
+                mode='lines',
+                line={'color': config.CHART_COLORS[i % len(config.CHART_COLORS)], 'width': 1, 'dash': 'dash'},
+                name=name,
+                hovertemplate=f'{name}: {format_value(value)}<extra></extra>',
+                showlegend=False
+            ))
+    else:
+        # Add average line - more subtle
+        avg_value = bank_values['Amount'].mean()
+        traces.append(go.Scatter(
+            x=bank_values['Name'],
+            y=[avg_value] * len(bank_values),
+            mode='lines',
+            line={'color': 'rgba(150,150,150,0.5)', 'width': 1, 'dash': 'dash'},
+            name='Average',
+            hovertemplate=f'Avg: {format_value(avg_value)}<extra></extra>',
+            showlegend=False
+        ))
+
+    return traces
+
+
+def _update_chart_layout(fig, height, **layout):
+    """Apply the shared compact metric chart layout."""
+    fig.update_layout(
+        height=height,
+        xaxis_title="",
+        yaxis_title="",
+        yaxis={'rangemode': 'tozero', 'gridcolor': 'rgba(200,200,200,0.2)'},
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'size': 10},
+        margin={'t': 5, 'b': 25, 'l': 35, 'r': 5},
+        hoverlabel={'bgcolor': 'white', 'font_size': 12}
+    )
+    fig.update_layout(**layout)
+
+
+def build_metric_bar_chart(bank_values, height, percent=False, benchmarks=()):
+    """Build the bar chart for one metric, with reference lines.
+
+    With ``percent`` the values are ratios in percent (derived metrics).
+    ``benchmarks`` are (name, value) pairs drawn as peer group lines; without
+    them the average of the bars is drawn.
+    """
+    # Chart with reference lines
+    fig = go.Figure(_metric_traces(bank_values, percent, benchmarks))
+
+    for i, (name, value) in enumerate(benchmarks):
+        fig.add_annotation(
+            x=1, xref='paper', y=value, text=name, showarrow=False, xanchor='right', yanchor='bottom',
+            font={'size': 9, 'color': config.CHART_COLORS[i % len(config.CHART_COLORS)]}
+        )
+
+    _update_chart_layout(fig, height)
+    return fig
+
+
+def prepare_animation_values(metric_data, level, bank_colors, period, sort_by_value=True):
+    """Turn rollup rows for one metric in every period into bars in one fixed order.
+
+    Bars keep their position across periods, ordered by value in ``period``
+    (or by name). Returns the bar values (Bank, Parent, Name, Color and the
+    Amount in ``period``) and the amounts as an Entity x Period frame.
+    """
+    amounts = metric_data.groupby(['Entity', 'Period'])['Amount'].sum(min_count=1).unstack('Period')
+    bars = prepare_bar_values(metric_data.drop_duplicates('Entity'), level, bank_colors, sort_by_value=False)
+    bars = bars.set_index('Bank').reindex(amounts.index)
+
+    selected = amounts[period] if period in amounts.columns else amounts.iloc[:, -1]
+    order = selected.sort_values(ascending=False).index if sort_by_value else amounts.index.sort_values()
+    bars = bars.loc[order].assign(Amount=selected.loc[order]).rename_axis('Bank').reset_index()
+    return bars, amounts.loc[order]
+
+
+def build_metric_animation(bars, amounts, height, period, percent=False, benchmarks=()):
+    """Build one metric's bar chart with a frame per period and a period slider.
+
+    Every period's values travel with the figure, so the slider and the play
+    button switch periods in the browser. ``benchmarks`` are
+    (period, ((name, value), ...)) pairs, drawn as peer group lines.
+    """
+    groups = list(dict.fromkeys(name for _, pairs in benchmarks for name, _ in pairs))
+    by_period = {p: dict(pairs) for p, pairs in benchmarks}
+    periods = list(amounts.columns)
+    labels = [p.strftime('%b %Y') for p in periods]
+
+    frames = [
+        go.Frame(
+            name=label,
+            data=_metric_traces(
+                bars.assign(Amount=amounts[p].to_numpy()), percent,
+                tuple((name, by_period.get(p, {}).get(name, float('nan'))) for name in groups)
+            )
+        )
+        for p, label in zip(periods, labels, strict=True)
+    ]
+    active = periods.index(period) if period in periods else len(periods) - 1
+    fig = go.Figure(data=frames[active].data, frames=frames)
+
+    # A fixed y range keeps bar heights comparable across periods
+    top = max(amounts.max().max(), max((v for pairs in by_period.values() for v in pairs.values()), default=0))
+    bottom = min(amounts.min().min(), 0)
+    step_args = {'mode': 'immediate', 'frame': {'duration': 0, 'redraw': True}, 'transition': {'duration': 0}}
+    _update_chart_layout(
+        fig, height + 70,
+        yaxis={'range': [bottom * 1.15, top * 1.15 or 1], 'rangemode': 'normal'},
+        sliders=[{
+            'active': active,
+            'currentvalue': {'visible': False},
+            'pad': {'t': 30, 'b': 0},
+            'len': 0.85,
+            'x': 0.15,
+            'steps': [{'label': label, 'method': 'animate', 'args': [[label], step_args]} for label in labels],
+        }],
+        updatemenus=[{
+            'type': 'buttons',
+            'showactive': False,
+            'x': 0,
+            'y': 0,
+            'xanchor': 'left',
+            'yanchor': 'top',
+            'pad': {'t': 35},
+            'buttons': [{
+                'label': '▶',
+                'method': 'animate',
+                'args': [None, {**step_args, 'frame': {'duration': 800, 'redraw': True}, 'fromcurrent': True}],
+            }],
+        }],
+    )
+    return fig
+
+
+def _build_metric_chart(df, level, item, period, banks, sort_by_value, height, portfolios, countries,
+                        benchmarks, bank_colors):
+    """Compute the bar values and figure for one metric (Item code)."""
+    metric_data = rollups.get_level_values(df, level, list(banks), [item], period,
+                                           list(portfolios), list(countries))
+    bank_values = prepare_bar_values(metric_data, level, bank_colors, sort_by_value)
+    if bank_values.empty:
+        return bank_values, None
+    return bank_values, build_metric_bar_chart(bank_values, height, derived_metrics.is_derived(item), benchmarks)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_metric_chart(_df, version, level, item, period, banks, sort_by_value, height,
+                         portfolios, countries, benchmarks, bank_colors):
+    """Chart for one dataset version and selection; the frame itself is not hashed."""
+    return _build_metric_chart(_df, level, item, period, banks, sort_by_value, height,
+                               portfolios, countries, benchmarks, bank_colors)
+
+
+def get_metric_chart(df, level, item, period, banks, sort_by_value, bank_colors, height,
+                     portfolios=None, countries=None, benchmarks=()):
+    """Get (bar values, figure) for one metric (Item code), memoized per dataset version and selection.
+
+    The figure is None when no selected bank reports the metric.
+    """
+    key = (level, item, period, tuple(banks), sort_by_value, height,
+           tuple(portfolios or ()), tuple(countries or ()), tuple(benchmarks), bank_colors)
+    version = data_loader.dataset_version(df)
+    if version is None:
+        return _build_metric_chart(df, *key)
+    return _cached_metric_chart(df, version, *key)
+
+
+def _build_metric_animation(df, level, item, period, banks, sort_by_value, height, portfolios, countries,
+                            benchmarks, bank_colors):
+    """Compute the bar values and animated figure for one metric (Item code) over all periods."""
+    metric_data = rollups.get_level_values(df, level, list(banks), [item], None,
+                                           list(portfolios), list(countries))
+    if metric_data.empty:
+        return metric_data, None
+    bars, amounts = prepare_animation_values(metric_data, level, bank_colors, period, sort_by_value)
+    fig = build_metric_animation(bars, amounts, height, period, derived_metrics.is_derived(item), benchmarks)
+    return bars[bars['Amount'].notna()], fig
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _cached_metric_animation(_df, version, level, item, period, banks, sort_by_value, height,
+                             portfolios, countries, benchmarks, bank_colors):
+    """Animated chart for one dataset version and selection; the frame itself is not hashed."""
+    return _build_metric_animation(_df, level, item, period, banks, sort_by_value, height,
+                                   portfolios, countries, benchmarks, bank_colors)
+
+
+def get_metric_animation(df, level, item, period, banks, sort_by_value, bank_colors, height,
+                         portfolios=None, countries=None, benchmarks=()):
+    """Get (bar values in ``period``, figure with a frame per period) for one metric (Item code).
+
+    ``benchmarks`` are (period, ((name, value), ...)) pairs. The figure is
+    None when no selected bank reports the metric in any period.
+    """
+    key = (level, item, period, tuple(banks), sort_by_value, height,
+           tuple(portfolios or ()), tuple(countries or ()), tuple(benchmarks), bank_colors)
+    version = data_loader.dataset_version(df)
+    if version is None:
+        return _build_metric_animation(df, *key)
+    return _cached_metric_animation(df, version, *key)
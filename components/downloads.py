@@ -1,10 +1,20 @@
 """Download and export functionality."""
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from io import BytesIO
 
 import pandas as pd
 import streamlit as st
 
+from src import config, data_loader, dataset_scan
+
+PARTITION_COLUMNS = {'NSA': 'Bank (NSA)', 'Sheet': 'Sheet'}
+PARTITION_FORMATS = ['CSV', 'Parquet']
+
 
 def create_excel_download(df, filename_prefix="transparency_data"):
     """Create Excel file for download with multiple sheets."""
@@ -52,6 +62,134 @@ def create_excel_download(df, filename_prefix="transparency_data"):
     return output, filename
 
 
+def _write_partition(df, positions, path, file_format):
+    """Write one partition of the frame to disk and return its path."""
+    part = df.take(positions)
+    if file_format == 'Parquet':
+        part.to_parquet(path, engine='pyarrow', index=False)
+    else:
+        part.to_csv(path, index=False)
+    return path
+
+
+def write_partitioned_zip(df, partition_by='NSA', file_format='CSV', max_workers=4):
+    """Split a frame into one file per partition and stream the parts into a zip.
+
+    Parts are written to disk in parallel, at most ``max_workers`` at a time,
+    and each is moved into the archive and deleted as soon as it is done, so
+    only a few partitions are ever held in memory. Returns the archive as an
+    open temporary file positioned at the start.
+    """
+    extension = 'parquet' if file_format == 'Parquet' else 'csv'
+    # Parquet parts are already compressed
+    compression = zipfile.ZIP_STORED if file_format == 'Parquet' else zipfile.ZIP_DEFLATED
+    archive = tempfile.TemporaryFile(suffix='.zip')
+
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            zipfile.ZipFile(archive, 'w', compression=compression) as zf, \
+            ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def add_finished(futures):
+            for future in futures:
+                path = future.result()
+                zf.write(path, arcname=os.path.basename(path))
+                os.remove(path)
+
+        pending = set()
+        for key, positions in df.groupby(partition_by, observed=True).indices.items():
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                add_finished(done)
+
+            safe_key = re.sub(r'[^\w.-]+', '_', str(key)).strip('_') or 'blank'
+            path = os.path.join(tmp_dir, f"{partition_by}_{safe_key}.{extension}")
+            pending.add(pool.submit(_write_partition, df, positions, path, file_format))
+
+        add_finished(pending)
+
+    archive.seek(0)
+    return archive
+
+
+def render_partitioned_download(df, filename_prefix="transparency_data", key="partitioned"):
+    """Render controls to download a selection split into per-partition files as a zip."""
+    cols = st.columns([2, 1, 1])
+
+    with cols[0]:
+        partition_by = st.selectbox(
+            "Split by",
+            list(PARTITION_COLUMNS),
+            format_func=PARTITION_COLUMNS.get,
+            key=f"{key}_by"
+        )
+
+    with cols[1]:
+        file_format = st.selectbox("Part format", PARTITION_FORMATS, key=f"{key}_format")
+
+    with cols[2]:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # The archive is only built when the button is clicked
+        st.download_button(
+            label="📦 Download as ZIP",
+            data=lambda: write_partitioned_zip(df, partition_by, file_format),
+            file_name=f"{filename_prefix}_by_{partition_by.lower()}_{timestamp}.zip",
+            mime="application/zip",
+            key=f"{key}_button",
+            use_container_width=True
+        )
+
+    st.caption(f"One {file_format} file per {PARTITION_COLUMNS[partition_by].lower()}: "
+               f"{df[partition_by].nunique()} files")
+
+
+def render_file_download(source_path, banks=None, filename_prefix="transparency_data", key="file"):
+    """Render controls to download a whole dataset file, optionally limited to some banks.
+
+    The export is written from the file in batches when the button is
+    clicked, without copying the loaded dataset. Streamlit then reads the
+    finished file into memory to serve it, so exports above
+    ``config.DOWNLOAD_MAX_ROWS`` records are pointed to the CLI instead.
+    """
+    rows = dataset_scan.get_row_count(source_path, banks)
+    if rows > config.DOWNLOAD_MAX_ROWS:
+        bank_args = ''.join(f" --bank {bank}" for bank in banks or ())
+        st.info(
+            f"{rows:,} records are more than the in-app download limit of {config.DOWNLOAD_MAX_ROWS:,}. "
+            f"Select fewer banks, or export with "
+            f"`python -m src.dataset_scan {source_path} --output export.csv{bank_args}`."
+        )
+        return
+
+    cols = st.columns([1, 1])
+
+    with cols[0]:
+        file_format = st.selectbox("Format", ["Excel", "CSV"], key=f"{key}_format",
+                                   label_visibility="collapsed")
+
+    with cols[1]:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if file_format == "Excel":
+            st.download_button(
+                label="Download",
+                data=lambda: dataset_scan.export_excel(source_path, banks),
+                file_name=f"{filename_prefix}_{timestamp}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"{key}_button",
+                use_container_width=True
+            )
+        else:
+            st.download_button(
+                label="Download",
+                data=lambda: dataset_scan.export_csv(source_path, banks),
+                file_name=f"{filename_prefix}_{timestamp}.csv",
+                mime="text/csv",
+                key=f"{key}_button",
+                use_container_width=True
+            )
+
+    st.caption(f"💾 Download includes {rows:,} records")
+
+
 def render_download_section(df, filtered_df=None):
     """Render download section with options."""
     st.subheader("📥 Download Data")
@@ -64,6 +202,14 @@ def render_download_section(df, filtered_df=None):
 
     df_to_download = filtered_df if download_option.startswith("Filtered") and filtered_df is not None else df
 
+    # The full dataset is exported straight from its file
+    source_path = data_loader.get_source_path(df_to_download) if df_to_download is not None else None
+    if source_path is not None:
+        render_file_download(source_path, key="all_data")
+        with st.expander("📦 Split into multiple files"):
+            render_partitioned_download(df_to_download, key="all_data_partitioned")
+        return
+
     if df_to_download is None or df_to_download.empty:
         st.warning("No data available to download")
         return
@@ -100,6 +246,9 @@ def render_download_section(df, filtered_df=None):
             use_container_width=True
         )
 
+    with st.expander("📦 Split into multiple files"):
+        render_partitioned_download(df_to_download)
+
 
 def render_chart_export_button(fig, chart_name="chart"):
     """Render button to export chart as image."""
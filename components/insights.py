@@ -1,17 +1,23 @@
-"""Automated insights and suggestions."""
-import streamlit as st
+"""Automated insights and suggestions.
 
-from src import bank_catalog, metric_catalog
+Each insight is an independent check. On the Compare page the checks run
+in a background thread pool per selection, so the charts render at once and
+the insight cards fill in as each check completes; a new selection cancels
+the checks still queued for the previous one.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import streamlit as st
 
-def generate_insights(df, banks=None, metrics=None, period=None):
-    """Generate automated insights from the data."""
-    if df is None or df.empty:
-        return []
+from src import bank_catalog, config, data_loader, metric_catalog, peer_groups
+
+# Shared by all sessions; insight checks are short pandas computations
+_executor = ThreadPoolExecutor(max_workers=config.INSIGHT_WORKERS, thread_name_prefix='insights')
 
-    insights = []
 
-    # Filter data if specified
+def _filter_selection(df, banks=None, metrics=None, period=None):
+    """Filter data to the selection the insights describe."""
     filtered_df = df.copy()
     if banks:
         filtered_df = filtered_df[filtered_df['NSA'].isin(banks)]
@@ -19,20 +25,26 @@ def generate_insights(df, banks=None, metrics=None, period=None):
         filtered_df = filtered_df[filtered_df['Label'].isin(metrics)]
     if period:
         filtered_df = filtered_df[filtered_df['Period'] == period]
+    return filtered_df
 
-    # Insight 1: Highest exposure bank
+
+def _highest_exposure(df, filtered_df, banks):
+    """Insight 1: Highest exposure bank."""
     if not filtered_df.empty and 'Amount' in filtered_df.columns:
-        bank_totals = filtered_df.groupby('NSA')['Amount'].sum().sort_values(ascending=False)
+        bank_totals = filtered_df.groupby('NSA', observed=True)['Amount'].sum().sort_values(ascending=False)
         if len(bank_totals) > 0:
             top_bank = bank_totals.index[0]
             top_amount = bank_totals.iloc[0]
-            insights.append({
+            return {
                 'type': 'info',
                 'title': '🏆 Highest Exposure',
                 'message': f"{bank_catalog.get_bank_display_name(top_bank)} ({top_bank}) has the highest total exposure: {top_amount:,.0f}"
-            })
+            }
+    return None
+
 
-    # Insight 2: Period-over-period trends
+def _period_trend(df, filtered_df, banks):
+    """Insight 2: Period-over-period trends."""
     if 'Period' in filtered_df.columns and filtered_df['Period'].nunique() > 1:
         periods_sorted = sorted(filtered_df['Period'].unique())
         if len(periods_sorted) >= 2:
@@ -46,13 +58,16 @@ def generate_insights(df, banks=None, metrics=None, period=None):
                 change_pct = ((latest_total - previous_total) / previous_total) * 100
                 direction = "increased" if change_pct > 0 else "decreased"
 
-                insights.append({
+                return {
                     'type': 'success' if change_pct > 0 else 'warning',
                     'title': '📈 Period Trend',
                     'message': f"Total exposure {direction} by {abs(change_pct):.2f}% from {previous.strftime('%b %Y')} to {latest.strftime('%b %Y')}"
-                })
+                }
+    return None
 
-    # Insight 3: Regional comparison
+
+def _regional_leader(df, filtered_df, banks):
+    """Insight 3: Regional comparison."""
     if banks and len(banks) > 1:
         regional_data = {}
         for bank in banks:
@@ -65,22 +80,29 @@ def generate_insights(df, banks=None, metrics=None, period=None):
 
         if regional_data:
             top_region = max(regional_data, key=regional_data.get)
-            insights.append({
+            return {
                 'type': 'info',
                 'title': '🌍 Regional Leader',
                 'message': f"{top_region} region shows the highest total exposure among selected banks"
-            })
+            }
+    return None
+
 
-    # Insight 4: Data quality
-    null_counts = filtered_df['Amount'].isna().sum()
+def _data_quality(df, filtered_df, banks):
+    """Insight 4: Data quality (skipped when conversion found no missing amounts)."""
+    report = data_loader.get_quality_report(df)
+    null_counts = 0 if report and report['columns']['Amount']['nulls'] == 0 else filtered_df['Amount'].isna().sum()
     if null_counts > 0:
-        insights.append({
+        return {
             'type': 'warning',
             'title': '⚠️ Data Quality',
             'message': f"Found {null_counts} missing values in selected data ({(null_counts/len(filtered_df)*100):.1f}%)"
-        })
+        }
+    return None
+
 
-    # Insight 5: Outlier detection
+def _outliers(df, filtered_df, banks):
+    """Insight 5: Outlier detection."""
     if 'Amount' in filtered_df.columns and len(filtered_df) > 10:
         q1 = filtered_df['Amount'].quantile(0.25)
         q3 = filtered_df['Amount'].quantile(0.75)
@@ -91,43 +113,139 @@ def generate_insights(df, banks=None, metrics=None, period=None):
         ]
 
         if len(outliers) > 0:
-            insights.append({
+            return {
                 'type': 'info',
                 'title': '🔍 Outliers Detected',
                 'message': f"Found {len(outliers)} outlier values ({(len(outliers)/len(filtered_df)*100):.1f}% of data)"
-            })
+            }
+    return None
 
-    return insights
+
+# (placeholder title, check) in display order
+INSIGHT_CHECKS = [
+    ('🏆 Highest Exposure', _highest_exposure),
+    ('📈 Period Trend', _period_trend),
+    ('🌍 Regional Leader', _regional_leader),
+    ('⚠️ Data Quality', _data_quality),
+    ('🔍 Outliers', _outliers),
+]
+
+
+def generate_insights(df, banks=None, metrics=None, period=None):
+    """Generate automated insights from the data."""
+    if df is None or df.empty:
+        return []
+
+    filtered_df = _filter_selection(df, banks, metrics, period)
+    insights = [check(df, filtered_df, banks) for _, check in INSIGHT_CHECKS]
+    return [insight for insight in insights if insight is not None]
+
+
+class InsightJob:
+    """Insight checks for one selection, running on the shared thread pool."""
+
+    def __init__(self, df, banks=None, metrics=None, period=None):
+        self._cancelled = threading.Event()
+        self._filtered = _executor.submit(self._guard, _filter_selection, df, banks, metrics, period)
+        self.futures = [
+            _executor.submit(self._run_check, check, df, banks)
+            for _, check in INSIGHT_CHECKS
+        ]
+
+    def _guard(self, func, *args):
+        """Skip work once the job is cancelled."""
+        if self._cancelled.is_set():
+            return None
+        return func(*args)
+
+    def _run_check(self, check, df, banks):
+        # The filter was submitted first, so it is running or done by now
+        filtered_df = self._filtered.result()
+        if filtered_df is None:
+            return None
+        return self._guard(check, df, filtered_df, banks)
+
+    def cancel(self):
+        """Drop queued checks; running checks finish but their results are ignored."""
+        self._cancelled.set()
+        for future in [self._filtered, *self.futures]:
+            future.cancel()
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+
+def start_insights(df, banks=None, metrics=None, period=None):
+    """Start (or keep) the background insight job for this session's selection.
+
+    A job for a different selection is cancelled and replaced.
+    """
+    key = (data_loader.dataset_version(df), tuple(banks or ()), tuple(metrics or ()), period)
+    current = st.session_state.get('insight_job')
+    if current is not None and current[0] == key:
+        return current[1]
+
+    if current is not None:
+        current[1].cancel()
+    job = InsightJob(df, banks, metrics, period)
+    st.session_state.insight_job = (key, job)
+    return job
+
+
+def _render_insight(insight):
+    """Render one insight card."""
+    insight_type = insight['type']
+    title = insight['title']
+    message = insight['message']
+
+    if insight_type == 'success':
+        st.success(f"**{title}**\n\n{message}")
+    elif insight_type == 'warning':
+        st.warning(f"**{title}**\n\n{message}")
+    elif insight_type == 'error':
+        st.error(f"**{title}**\n\n{message}")
+    else:
+        st.info(f"**{title}**\n\n{message}")
+
+
+def _render_insight_cards(job):
+    """Render finished insights and placeholders for the pending ones."""
+    pending = False
+    shown = 0
+    for (title, _), future in zip(INSIGHT_CHECKS, job.futures, strict=True):
+        if not future.done():
+            pending = True
+            st.caption(f"⏳ {title}…")
+        elif not future.cancelled() and future.exception() is None and future.result() is not None:
+            _render_insight(future.result())
+            shown += 1
+
+    if pending:
+        return
+    if not shown:
+        st.info("No specific insights available for current selection. Try selecting different banks or metrics.")
+    if st.session_state.get('insight_polling'):
+        # Everything arrived: one full rerun registers the section without polling
+        st.session_state.insight_polling = False
+        st.rerun()
 
 
 def render_insights_section(df, banks=None, metrics=None, period=None):
-    """Render insights section."""
+    """Render insights section; cards fill in as their background checks complete."""
     st.subheader("💡 Automated Insights")
 
-    with st.spinner("Generating insights..."):
-        insights = generate_insights(df, banks, metrics, period)
-
-    if not insights:
+    if df is None or df.empty:
         st.info("No specific insights available for current selection. Try selecting different banks or metrics.")
         return
 
-    for insight in insights:
-        insight_type = insight['type']
-        title = insight['title']
-        message = insight['message']
-
-        if insight_type == 'success':
-            st.success(f"**{title}**\n\n{message}")
-        elif insight_type == 'warning':
-            st.warning(f"**{title}**\n\n{message}")
-        elif insight_type == 'error':
-            st.error(f"**{title}**\n\n{message}")
-        else:
-            st.info(f"**{title}**\n\n{message}")
+    job = start_insights(df, banks, metrics, period)
+    polling = not job.done()
+    st.session_state.insight_polling = polling
+    st.fragment(_render_insight_cards, run_every=config.INSIGHT_POLL_INTERVAL if polling else None)(job)
 
 
 def render_suggestions_panel(df, banks, metrics):
-    """Render suggestions for analysis."""
+    """Render suggestions for analysis of the selected banks and metrics (labels)."""
     st.subheader("🎯 Suggested Analyses")
 
     suggestions = []
@@ -143,12 +261,17 @@ def render_suggestions_panel(df, banks, metrics):
     # Suggestion 2: Peer comparison
     if banks and len(banks) == 1:
         bank = banks[0]
-        region = bank_catalog.get_region_for_bank(bank)
-        peer_banks = [b for b in bank_catalog.get_banks_by_region(region) if b != bank]
+        saved_groups = peer_groups.get_groups_containing(bank)
+        if saved_groups:
+            description = f'Benchmark {bank_catalog.get_bank_display_name(bank)} against its peer groups: {", ".join(saved_groups[:3])}'
+        else:
+            region = bank_catalog.get_region_for_bank(bank)
+            peer_banks = [b for b in bank_catalog.get_banks_by_region(region) if b != bank]
+            description = f'Compare {bank_catalog.get_bank_display_name(bank)} with other {region} banks: {", ".join(peer_banks[:3])}'
 
         suggestions.append({
             'title': 'Peer Group Comparison',
-            'description': f'Compare {bank_catalog.get_bank_display_name(bank)} with other {region} banks: {", ".join(peer_banks[:3])}',
+            'description': description,
             'action': 'Compare with peers'
         })
 
@@ -157,7 +280,8 @@ def render_suggestions_panel(df, banks, metrics):
         suggestions.append({
             'title': 'Metric Correlation',
             'description': f'Analyze correlation between {len(metrics)} selected metrics',
-            'action': 'View correlations'
+            'action': 'View correlations',
+            'page': 'pages/Correlation.py'
         })
 
     # Suggestion 4: Risk metrics focus
@@ -181,6 +305,10 @@ def render_suggestions_panel(df, banks, metrics):
             with col2:
                 if st.button("→", key=f"suggestion_{idx}", use_container_width=True):
                     st.session_state[f"suggestion_{idx}"] = True
+                    if 'page' in suggestion:
+                        # Pages share the metric selection as Item codes
+                        st.session_state.selected_metrics = data_loader.get_item_codes(df, metrics)
+                        st.switch_page(suggestion['page'])
                     st.info(f"Action: {suggestion['action']}")
 
             st.divider()
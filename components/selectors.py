@@ -0,0 +1,36 @@
+"""Shared selection widgets."""
+import streamlit as st
+
+from src import config, data_loader
+
+# Session selections that refer to one dataset's banks, metrics and periods
+DATASET_SCOPED_KEYS = (
+    'selected_banks', 'selected_metrics', 'selected_period', 'bank_colors',
+    'selected_portfolios', 'selected_countries',
+)
+
+
+def render_dataset_selector():
+    """Render the sidebar dataset picker and return the selected dataset name."""
+    datasets = data_loader.get_datasets()
+    if not datasets:
+        return config.DEFAULT_DATASET
+
+    if st.session_state.get('dataset') not in datasets:
+        st.session_state.dataset = config.DEFAULT_DATASET if config.DEFAULT_DATASET in datasets else datasets[0]
+
+    if len(datasets) > 1:
+        st.sidebar.selectbox(
+            "🗂️ Dataset",
+            datasets,
+            format_func=data_loader.get_dataset_title,
+            key='dataset'
+        )
+
+    # Selections made on another dataset do not apply to this one
+    if st.session_state.get('selection_dataset') != st.session_state.dataset:
+        for key in DATASET_SCOPED_KEYS:
+            st.session_state.pop(key, None)
+        st.session_state.selection_dataset = st.session_state.dataset
+
+    return st.session_state.dataset
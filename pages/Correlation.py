@@ -0,0 +1,108 @@
+"""Metric Correlation Page"""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from components import selectors
+from src import config, correlation, data_loader, metric_catalog
+
+st.set_page_config(
+    page_title=config.APP_TITLE,
+    page_icon=config.APP_ICON,
+    layout=config.PAGE_LAYOUT,
+    initial_sidebar_state="expanded"
+)
+
+st.title("Metric Correlation")
+
+dataset = selectors.render_dataset_selector()
+
+# Load data
+df = data_loader.load_data(dataset)
+
+if df is None:
+    st.error("⚠️ Failed to load data")
+    st.stop()
+
+all_banks = data_loader.get_banks(dataset)
+all_metrics = data_loader.get_metrics(dataset)
+all_periods = data_loader.get_periods(dataset)
+
+top_cols = st.columns([2, 2, 3])
+
+with top_cols[0]:
+    period = st.selectbox(
+        "📅 Period",
+        all_periods,
+        index=all_periods.index(st.session_state.selected_period)
+        if st.session_state.get('selected_period') in all_periods else len(all_periods) - 1,
+        format_func=lambda x: x.strftime('%b %Y') if pd.notna(x) else 'Unknown'
+    )
+
+with top_cols[1]:
+    method = st.selectbox("Method", ['pearson', 'spearman'], format_func=str.title)
+
+with top_cols[2]:
+    banks = st.multiselect(
+        "🏦 Banks (leave empty for all)",
+        all_banks,
+        default=None
+    )
+
+# Compare shares its metric selection as Item codes
+item_labels = data_loader.get_item_labels(df)
+selected_labels = [item_labels[i] for i in st.session_state.get('selected_metrics', []) if i in item_labels]
+default_metrics = [m for m in selected_labels if m in all_metrics]
+metrics = st.multiselect(
+    "📊 Metrics",
+    all_metrics,
+    default=default_metrics if len(default_metrics) > 1 else all_metrics[:8],
+    format_func=metric_catalog.get_metric_short_name
+)
+
+corr = correlation.get_correlation_matrix(df, period, banks, method)
+
+if corr.empty:
+    st.info(f"Select at least {correlation.MIN_BANKS} banks to compute correlations")
+    st.stop()
+
+if len(metrics) < 2:
+    st.info("Select at least two metrics")
+    st.stop()
+
+shown = [m for m in metrics if m in corr.index]
+dropped = [m for m in metrics if m not in corr.index]
+if dropped:
+    st.caption(f"Not shown (no variation across banks): {', '.join(metric_catalog.get_metric_short_name(m) for m in dropped)}")
+
+view = corr.loc[shown, shown]
+short_names = [metric_catalog.get_metric_short_name(m) for m in shown]
+
+fig = go.Figure(go.Heatmap(
+    z=view.to_numpy(),
+    x=short_names,
+    y=short_names,
+    zmin=-1,
+    zmax=1,
+    colorscale='RdBu',
+    hovertemplate='%{y}<br>%{x}<br>r = %{z:.2f}<extra></extra>'
+))
+fig.update_layout(
+    height=max(350, min(1200, len(shown) * 40 + 150)),
+    yaxis={'autorange': 'reversed'},
+    font={'size': 10},
+    margin={'t': 5, 'b': 5, 'l': 5, 'r': 5}
+)
+st.plotly_chart(fig, width="stretch")
+
+# Strongest pairs
+with st.expander("🔗 Strongest Correlations", expanded=True):
+    pairs = correlation.get_top_pairs(corr, shown)
+    pairs['Metric A'] = pairs['Metric A'].apply(metric_catalog.get_metric_short_name)
+    pairs['Metric B'] = pairs['Metric B'].apply(metric_catalog.get_metric_short_name)
+    st.dataframe(
+        pairs,
+        hide_index=True,
+        width="stretch",
+        column_config={'Correlation': st.column_config.NumberColumn(format="%.2f")}
+    )
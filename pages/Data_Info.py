@@ -1,11 +1,10 @@
 """Data & Information Page"""
-from datetime import datetime
-from io import BytesIO
 
 import pandas as pd
 import streamlit as st
 
-from src import config, data_loader
+from components import downloads, selectors
+from src import cache, config, data_loader, metadata
 
 st.set_page_config(
     page_title=config.APP_TITLE,
@@ -16,8 +15,10 @@ st.set_page_config(
 
 st.title("Data & Info")
 
+dataset = selectors.render_dataset_selector()
+
 # Load data
-df = data_loader.load_data()
+df = data_loader.load_data(dataset)
 
 if df is None:
     st.error("⚠️ Failed to load data")
@@ -50,59 +51,73 @@ with st.expander("📖 About", expanded=False):
     **Purpose:** Enable comparison and analysis of key banking metrics
     """)
 
+# Code lists from TR_Metadata.xlsx
+with st.expander("📚 Code Lists", expanded=False):
+    items_tab, portfolio_tab, country_tab = st.tabs(["Items", "Portfolios", "Countries"])
+
+    with items_tab:
+        st.dataframe(metadata.get_metadata_table('items'), width='stretch', height=300)
+    with portfolio_tab:
+        st.dataframe(metadata.get_metadata_table('portfolios'), width='stretch')
+    with country_tab:
+        st.dataframe(metadata.get_metadata_table('countries'), width='stretch', height=300)
+
+# Quality report stored at conversion
+with st.expander("🩺 Data Quality", expanded=False):
+    report = data_loader.get_quality_report(df)
+    if report is None:
+        st.caption("No quality report stored for this file. Run `python -m src.convert_data` to create one.")
+    else:
+        quality_cols = st.columns(3)
+        with quality_cols[0]:
+            st.metric("Duplicate rows", f"{report['duplicate_rows']:,}")
+        with quality_cols[1]:
+            st.metric("Missing amounts", f"{report['columns']['Amount']['nulls']:,}")
+        with quality_cols[2]:
+            st.metric("Date range", summary['date_range'])
+        st.dataframe(
+            pd.DataFrame.from_dict(report['columns'], orient='index').rename_axis('Column'),
+            width='stretch',
+            height=300
+        )
+
+# Derived-data caches keyed by dataset version
+with st.expander("⚙️ Cache Statistics", expanded=False):
+    stats = pd.DataFrame.from_dict(cache.cache_stats(), orient='index').rename_axis('Function')
+    st.dataframe(stats, width='stretch')
+
 st.divider()
 
 # Download section
 st.markdown("#### 📥 Download Data")
 
-download_cols = st.columns([2, 1, 1])
+download_cols = st.columns([2, 2])
 
 with download_cols[0]:
     selected_banks = st.multiselect(
         "Select banks (leave empty for all)",
-        data_loader.get_banks(),
+        data_loader.get_banks(dataset),
         default=None,
         label_visibility="collapsed"
     )
 
-# Filter data
-download_df = df.copy()
-if selected_banks:
-    download_df = download_df[download_df['NSA'].isin(selected_banks)]
+prefix = f"banking_data_{len(selected_banks) if selected_banks else 'all'}_banks"
 
 with download_cols[1]:
-    format_option = st.selectbox("Format", ["Excel", "CSV"], label_visibility="collapsed")
-
-with download_cols[2]:
-    if format_option == "Excel":
-        # Create Excel file
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            download_df.to_excel(writer, sheet_name='Data', index=False)
-        output.seek(0)
-
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"banking_data_{len(selected_banks) if selected_banks else 'all'}_banks_{timestamp}.xlsx"
-
-        st.download_button(
-            label="Download",
-            data=output,
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
-    else:
-        # CSV download
-        csv_data = download_df.to_csv(index=False).encode('utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"banking_data_{len(selected_banks) if selected_banks else 'all'}_banks_{timestamp}.csv"
-
-        st.download_button(
-            label="Download",
-            data=csv_data,
-            file_name=filename,
-            mime="text/csv",
-            use_container_width=True
-        )
+    downloads.render_file_download(
+        data_loader.get_source_path(df),
+        banks=selected_banks or None,
+        filename_prefix=prefix,
+        key="data_info_file"
+    )
 
-st.caption(f"💾 Download includes {len(download_df):,} records")
+# Filter data
+download_df = df[df['NSA'].isin(selected_banks)] if selected_banks else df
+
+# Large selections don't fit in one Excel sheet; split them per bank or sheet
+with st.expander("📦 Split into multiple files", expanded=False):
+    downloads.render_partitioned_download(
+        download_df,
+        filename_prefix=prefix,
+        key="data_info_partitioned"
+    )
@@ -0,0 +1,106 @@
+"""Peer Ranking Page"""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from components import selectors
+from src import bank_catalog, config, data_loader, metric_catalog, peer_ranks
+
+st.set_page_config(
+    page_title=config.APP_TITLE,
+    page_icon=config.APP_ICON,
+    layout=config.PAGE_LAYOUT,
+    initial_sidebar_state="expanded"
+)
+
+st.title("Peer Ranking")
+
+dataset = selectors.render_dataset_selector()
+
+# Load data
+df = data_loader.load_data(dataset)
+
+if df is None:
+    st.error("⚠️ Failed to load data")
+    st.stop()
+
+all_banks = data_loader.get_banks(dataset)
+all_periods = data_loader.get_periods(dataset)
+
+top_cols = st.columns([2, 2, 3])
+
+with top_cols[0]:
+    bank = st.selectbox(
+        "🏦 Bank",
+        all_banks,
+        index=all_banks.index(st.session_state.selected_banks[0])
+        if st.session_state.get('selected_banks') and st.session_state.selected_banks[0] in all_banks else 0,
+        format_func=lambda b: f"{b} - {bank_catalog.get_bank_display_name(b)}"
+    )
+
+with top_cols[1]:
+    period = st.selectbox(
+        "📅 Period",
+        all_periods,
+        index=len(all_periods) - 1,
+        format_func=lambda x: x.strftime('%b %Y') if pd.notna(x) else 'Unknown'
+    )
+
+with top_cols[2]:
+    metric_search = st.text_input("Search metrics", placeholder="Type to search...")
+
+profile = peer_ranks.get_bank_profile(df, bank, period)
+if metric_search:
+    profile = profile[profile['Label'].isin(metric_catalog.search_metrics(profile['Label'].tolist(), metric_search))]
+
+if profile.empty:
+    st.info("No data for this bank and period")
+    st.stop()
+
+# Summary
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Metrics reported", len(profile))
+with col2:
+    st.metric("Median percentile", f"{profile['Percentile'].median():.0f}")
+with col3:
+    st.metric("Top-3 positions", int((profile['Rank'] <= 3).sum()))
+
+st.divider()
+
+profile = profile.assign(Metric=profile['Label'].apply(metric_catalog.get_metric_short_name))
+
+# Percentile profile chart
+fig = go.Figure(go.Bar(
+    x=profile['Percentile'],
+    y=profile['Metric'],
+    orientation='h',
+    marker_color=[config.CHART_COLORS[0] if z >= 0 else config.CHART_COLORS[1] for z in profile['Z_Score'].fillna(0)],
+    customdata=profile[['Rank', 'Peers', 'Z_Score']],
+    hovertemplate='<b>%{y}</b><br>Percentile: %{x:.0f}<br>Rank %{customdata[0]} of %{customdata[1]}'
+                  '<br>z-score: %{customdata[2]:.2f}<extra></extra>'
+))
+fig.add_vline(x=50, line={'color': 'rgba(150,150,150,0.5)', 'width': 1, 'dash': 'dash'})
+fig.update_layout(
+    height=max(250, min(2000, len(profile) * 22 + 60)),
+    xaxis={'range': [0, 100], 'title': 'Percentile among peers'},
+    yaxis={'autorange': 'reversed'},
+    plot_bgcolor='rgba(0,0,0,0)',
+    font={'size': 10},
+    margin={'t': 5, 'b': 25, 'l': 5, 'r': 5}
+)
+st.plotly_chart(fig, width="stretch")
+
+# Full ranking table
+with st.expander("📊 Data Table"):
+    table_df = profile[['Metric', 'Amount', 'Rank', 'Peers', 'Percentile', 'Z_Score']].copy()
+    st.dataframe(
+        table_df,
+        hide_index=True,
+        width="stretch",
+        column_config={
+            'Amount': st.column_config.NumberColumn(format="%.0f"),
+            'Percentile': st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+            'Z_Score': st.column_config.NumberColumn("z-score", format="%.2f"),
+        }
+    )
@@ -0,0 +1,114 @@
+"""Revisions Page"""
+import streamlit as st
+
+from components import selectors
+from src import config, revision_diff
+from src.dataset_registry import registry
+
+st.set_page_config(
+    page_title=config.APP_TITLE,
+    page_icon=config.APP_ICON,
+    layout=config.PAGE_LAYOUT,
+    initial_sidebar_state="expanded"
+)
+
+st.title("Revisions")
+
+dataset = selectors.render_dataset_selector()
+
+# Versions: saved snapshots, plus the current file when it is not the latest snapshot
+versions = {str(path): revision_diff.describe_snapshot(path) for path in revision_diff.list_snapshots(dataset)}
+current = registry.spec(dataset).source_path
+if current.exists():
+    versions.setdefault(str(current), f"Current file ({current.name})")
+
+if len(versions) < 2:
+    st.info(
+        "Revisions compare two versions of a dataset. Snapshots are saved each time a release is converted "
+        f"(`python -m src.convert_data {dataset}`) and kept in `{revision_diff.snapshot_dir(dataset)}`."
+    )
+    st.stop()
+
+paths = list(versions)
+
+top_cols = st.columns([3, 3, 2])
+with top_cols[0]:
+    old_path = st.selectbox("Old version", paths, index=len(paths) - 2, format_func=versions.get)
+with top_cols[1]:
+    new_path = st.selectbox("New version", paths, index=len(paths) - 1, format_func=versions.get)
+with top_cols[2]:
+    tolerance = st.number_input("Ignore changes up to", min_value=0.0, value=0.0, step=1.0)
+
+if old_path == new_path:
+    st.info("Select two different versions")
+    st.stop()
+
+with st.spinner("Comparing versions..."):
+    changes, summary = revision_diff.get_diff(old_path, new_path, tolerance)
+
+# Summary
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Added", f"{summary['added']:,}")
+with col2:
+    st.metric("Removed", f"{summary['removed']:,}")
+with col3:
+    st.metric("Revised", f"{summary['revised']:,}")
+with col4:
+    st.metric("Unchanged", f"{summary['unchanged']:,}")
+
+if changes.empty:
+    st.success("✓ No differences between these versions")
+    st.stop()
+
+st.divider()
+
+filter_cols = st.columns([3, 3])
+with filter_cols[0]:
+    kinds = st.multiselect(
+        "Show", list(revision_diff.REVISIONS), default=list(revision_diff.REVISIONS),
+        format_func=str.capitalize
+    )
+with filter_cols[1]:
+    bank_options = sorted(changes['NSA'].dropna().astype(str).unique()) if 'NSA' in changes else []
+    banks = st.multiselect("🏦 Banks", bank_options)
+
+shown = changes[changes['Revision'].isin(kinds)]
+if banks:
+    shown = shown[shown['NSA'].astype(str).isin(banks)]
+
+# Changed cells per metric
+if 'Label' in shown.columns and not shown.empty:
+    with st.expander("📊 Changes by metric", expanded=True):
+        by_metric = (
+            shown.groupby([shown['Label'].astype(str), 'Revision'])
+            .size()
+            .unstack('Revision', fill_value=0)
+            .reindex(columns=[kind for kind in revision_diff.REVISIONS if kind in kinds], fill_value=0)
+        )
+        by_metric = by_metric.loc[by_metric.sum(axis=1).sort_values(ascending=False).index]
+        st.dataframe(by_metric, width="stretch")
+
+# Changed cells
+table_df = shown.copy()
+if 'Period' in table_df.columns:
+    table_df['Period'] = table_df['Period'].dt.strftime('%b %Y')
+st.dataframe(
+    table_df,
+    hide_index=True,
+    width="stretch",
+    column_config={
+        'Old_Amount': st.column_config.NumberColumn("Old amount", format="%.2f"),
+        'New_Amount': st.column_config.NumberColumn("New amount", format="%.2f"),
+        'Change': st.column_config.NumberColumn(format="%.2f"),
+    }
+)
+
+st.download_button(
+    "📥 Download changes (CSV)",
+    data=shown.to_csv(index=False).encode('utf-8'),
+    file_name=f"{dataset}_revisions.csv",
+    mime="text/csv"
+)
+
+st.caption(f"Old: {old_path} · New: {new_path}")
@@ -0,0 +1,217 @@
+"""Headless batch generator for Compare-page report packs.
+
+Renders the Compare charts, data tables and automated insights for every
+bank (NSA, compared with its regional peers) or every region into static
+HTML and Excel files, without a browser:
+
+    python report.py --by bank
+    python report.py --by region --period 2025-06 --workers 4 --format html
+
+Targets are fanned out over a process pool. The dataset is loaded once in
+the parent process; on platforms with fork the workers share that copy.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from html import escape
+from pathlib import Path
+
+import pandas as pd
+
+from components import charts, insights
+from src import bank_catalog, config, data_loader, derived_metrics, metric_catalog, rollups
+
+# Dataset used by report workers; inherited from the parent when forked
+_df = None
+
+
+def _init_worker(dataset):
+    """Load the dataset in a worker unless it was inherited from the parent."""
+    global _df
+    if _df is None:
+        _df = data_loader.load_data(dataset)
+
+
+def get_targets(by, all_banks):
+    """Get report targets as {target: (title, banks in the comparison)}."""
+    targets = {}
+    if by == 'bank':
+        for bank in all_banks:
+            region = bank_catalog.get_region_for_bank(bank)
+            peers = [b for b in bank_catalog.get_banks_by_region(region) if b in all_banks and b != bank]
+            title = f"{bank_catalog.get_bank_display_name(bank)} ({bank}) vs {region} peers"
+            targets[bank] = (title, [bank] + peers)
+    else:
+        for region, region_banks in config.BANK_REGIONS.items():
+            banks = [b for b in region_banks if b in all_banks]
+            if banks:
+                targets[region] = (f"{region} banks", banks)
+    return targets
+
+
+def _render_html(title, period, sections, insight_list):
+    """Assemble the report HTML page."""
+    insight_html = "".join(
+        f"<div class='insight {escape(i['type'])}'><b>{escape(i['title'])}</b><br>{escape(i['message'])}</div>"
+        for i in insight_list
+    ) or "<p>No specific insights available for this selection.</p>"
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #262730; }}
+.grid {{ display: grid; grid-template-columns: repeat(2, minmax(0, 1fr)); gap: 1.5em; }}
+.insight {{ padding: .6em 1em; margin: .4em 0; border-radius: 4px; background: #e8f0fe; }}
+.insight.warning {{ background: #fff4e5; }}
+.insight.success {{ background: #e6f4ea; }}
+table {{ border-collapse: collapse; font-size: 12px; }}
+td, th {{ padding: 2px 8px; border-bottom: 1px solid #eee; text-align: right; }}
+</style>
+</head>
+<body>
+<h1>{escape(title)}</h1>
+<p>{escape(config.APP_TITLE)} · {pd.Timestamp(period).strftime('%b %Y')} · generated {datetime.now():%Y-%m-%d %H:%M}</p>
+<h2>💡 Automated Insights</h2>
+{insight_html}
+<h2>📊 Metrics</h2>
+<div class="grid">{''.join(sections)}</div>
+</body>
+</html>
+"""
+
+
+def build_report(target, title, banks, metrics, period, output_dir, formats, bank_colors):
+    """Render one report pack; runs inside a worker process."""
+    items = data_loader.get_item_codes(_df, metrics)
+    labels = data_loader.get_item_labels(_df)
+    level_values = rollups.get_level_values(_df, 'country', banks, items, period)
+    height = charts.get_chart_height(len(banks))
+
+    sections = []
+    tables = []
+    for item in items:
+        metric = labels[item]
+        metric_data = level_values[level_values['Item'] == item]
+        if metric_data.empty:
+            continue
+
+        bank_values = charts.prepare_bar_values(metric_data, 'country', bank_colors)
+        short_name = metric_catalog.get_metric_short_name(metric)
+
+        if 'html' in formats:
+            percent = derived_metrics.is_derived(item)
+            fig = charts.build_metric_bar_chart(bank_values, height, percent)
+            chart_html = fig.to_html(full_html=False, include_plotlyjs='cdn' if not sections else False)
+            table_html = bank_values[['Name', 'Amount']].rename(columns={'Name': 'Bank'}).to_html(
+                index=False, float_format=(config.PERCENTAGE_FORMAT if percent else config.AMOUNT_FORMAT).format
+            )
+            sections.append(f"<div><h4>{escape(short_name)}</h4>{chart_html}"
+                            f"<details><summary>Data Table</summary>{table_html}</details></div>")
+
+        tables.append(bank_values.set_index('Bank')['Amount'].rename(short_name))
+
+    insight_list = insights.generate_insights(_df, banks, metrics, period)
+
+    output_dir = Path(output_dir)
+    stem = f"{target.replace(' ', '_')}_{pd.Timestamp(period):%Y%m}"
+    written = []
+
+    if 'html' in formats:
+        html_path = output_dir / f"{stem}.html"
+        html_path.write_text(_render_html(title, period, sections, insight_list), encoding='utf-8')
+        written.append(html_path)
+
+    if 'xlsx' in formats:
+        xlsx_path = output_dir / f"{stem}.xlsx"
+        comparison = pd.concat(tables, axis=1).T if tables else pd.DataFrame()
+        with pd.ExcelWriter(xlsx_path, engine='openpyxl') as writer:
+            comparison.to_excel(writer, sheet_name='Comparison', index_label='Metric')
+            pd.DataFrame(insight_list, columns=['type', 'title', 'message']).to_excel(
+                writer, sheet_name='Insights', index=False
+            )
+            pd.DataFrame({
+                'Field': ['Report', 'Period', 'Banks', 'Generated'],
+                'Value': [title, pd.Timestamp(period).strftime('%b %Y'), ', '.join(banks),
+                          datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+            }).to_excel(writer, sheet_name='Metadata', index=False)
+        written.append(xlsx_path)
+
+    return target, written
+
+
+def run(by, dataset, period=None, metrics=None, output=None, formats=('html', 'xlsx'), workers=None):
+    """Generate report packs for every bank or region."""
+    global _df
+
+    start = time.perf_counter()
+    _df = data_loader.load_data(dataset)
+    if _df is None:
+        raise SystemExit("Failed to load data")
+
+    all_periods = data_loader.get_periods(dataset)
+    period = pd.Timestamp(period) if period else all_periods[-1]
+    metrics = metrics or data_loader.get_metrics(dataset)
+    all_banks = data_loader.get_banks(dataset)
+    targets = get_targets(by, all_banks)
+    bank_colors = charts.get_bank_colors(all_banks)
+
+    output_dir = Path(output or Path('reports') / f"{dataset}_{period:%Y%m}_{by}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Warm derived caches before forking so every worker inherits them
+    rollups.get_rollups(_df)
+    data_loader.get_item_labels(_df)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Generating {len(targets)} {by} reports for {period:%b %Y} with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(dataset,)) as pool:
+        futures = [
+            pool.submit(build_report, target, title, banks, metrics, period, output_dir, formats, bank_colors)
+            for target, (title, banks) in targets.items()
+        ]
+        for future in as_completed(futures):
+            target, written = future.result()
+            print(f"  ✓ {target}: {', '.join(p.name for p in written)}")
+
+    print(f"\n✓ {len(targets)} reports written to {output_dir} in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    """Run the batch report generator."""
+    parser = argparse.ArgumentParser(description="Generate Compare report packs for every bank or region.")
+    parser.add_argument('--by', choices=['bank', 'region'], default='bank')
+    parser.add_argument('--dataset', default=config.DEFAULT_DATASET)
+    parser.add_argument('--period', help="Period as YYYY-MM (default: latest)")
+    parser.add_argument('--metric', action='append', dest='metrics', help="Metric label (repeatable, default: all)")
+    parser.add_argument('--format', action='append', dest='formats', choices=['html', 'xlsx'],
+                        help="Output format (repeatable, default: html and xlsx)")
+    parser.add_argument('--output', help="Output directory (default: reports/<dataset>_<period>_<by>)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.period:
+        periods = data_loader.get_periods(args.dataset)
+        try:
+            period = pd.Timestamp(args.period)
+        except ValueError:
+            parser.error(f"invalid period: {args.period} (use YYYY-MM)")
+        if period not in periods:
+            parser.error(f"no data for period {args.period}; available: "
+                         f"{', '.join(f'{p:%Y-%m}' for p in periods)}")
+
+    run(args.by, args.dataset, args.period, args.metrics, args.output,
+        tuple(args.formats or ('html', 'xlsx')), args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Dataset-version keyed caching for functions of a loaded dataset.
+
+``st.cache_data`` hashes every argument, which means hashing millions of
+rows whenever a DataFrame is passed, and it pickles results on every hit.
+``versioned_cache`` instead keys on the registry's version id of the frame
+plus the remaining arguments, normalized so that list/set/tuple selections
+in any order share one entry. Entries are evicted least recently used, and
+every cache keeps hit/miss counters. Concurrent misses on the same key
+are computed once; the other callers wait for that result.
+
+Decorated functions take the dataset frame as their first argument. Their
+results must not depend on the order of list arguments, and callers must
+treat returned objects as read-only since they are shared.
+"""
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .dataset_registry import registry
+
+# name -> cache, for reporting
+_caches = {}
+
+
+def _normalize(value):
+    """Make an argument hashable; selections become sorted tuples."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_normalize(v) for v in value)
+        try:
+            return tuple(sorted(items))
+        except TypeError:
+            return items
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return value
+
+
+class VersionedCache:
+    """Bounded LRU cache for one function, keyed on (dataset version, arguments)."""
+
+    def __init__(self, func, maxsize):
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._entries = OrderedDict()
+        self._pending = {}  # key -> Future of the computation in progress
+        self._lock = threading.Lock()
+
+    def __call__(self, df, *args, **kwargs):
+        version = registry.version_of(df) if df is not None else None
+        if version is None:
+            # Not a registry frame (e.g. a filtered copy): nothing cheap to key on
+            with self._lock:
+                self.bypasses += 1
+            return self.func(df, *args, **kwargs)
+
+        key = (version, _normalize(args), _normalize(kwargs))
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            future = self._pending.get(key)
+            if future is None:
+                self.misses += 1
+                future = self._pending[key] = Future()
+                leader = True
+            else:
+                # Another caller is computing this entry; share its result
+                self.hits += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        # Compute outside the lock so slow entries do not block other lookups
+        try:
+            result = self.func(df, *args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._pending.pop(key, None)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """Get hit/miss counters and size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+def versioned_cache(maxsize=32):
+    """Cache a function of a dataset frame per dataset version and normalized arguments."""
+    def decorator(func):
+        cache = VersionedCache(func, maxsize)
+        _caches[f"{func.__module__}.{func.__qualname__}"] = cache
+
+        @functools.wraps(func)
+        def wrapper(df, *args, **kwargs):
+            return cache(df, *args, **kwargs)
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Get counters for every versioned cache, by function name."""
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def clear_all():
+    """Empty every versioned cache."""
+    for cache in _caches.values():
+        cache.clear()
@@ -1,8 +1,30 @@
 """Configuration settings for the Transparency Dashboard."""
 
+# Datasets (EBA transparency templates). A .parquet file next to the CSV is preferred.
+DATASETS = {
+    "cre": {"title": "Credit Risk", "path": "data/tr_cre.csv",
+            "extra_columns": ["Portfolio", "Country"]},
+    "mrk": {"title": "Market Risk", "path": "data/tr_mrk.csv",
+            "extra_columns": ["Portfolio"]},
+    "sov": {"title": "Sovereign Exposures", "path": "data/tr_sov.csv",
+            "extra_columns": ["Country"]},
+    "oth": {"title": "Other Templates", "path": "data/tr_oth.csv"},
+}
+DEFAULT_DATASET = "cre"
+DATASET_MEMORY_LIMIT_MB = 2048  # Least recently used datasets are evicted above this
+
 # File paths
-DATA_PATH = "data/tr_cre.csv"
+DATA_PATH = DATASETS[DEFAULT_DATASET]["path"]
 METADATA_PATH = "data/TR_Metadata.xlsx"
+METADATA_CACHE_DIR = "data/metadata"  # Parquet sidecars converted from METADATA_PATH
+
+# CSV to Parquet conversion (streamed in blocks, written in row groups)
+CONVERT_BLOCK_SIZE = 32 * 1024 * 1024  # bytes of CSV parsed per batch
+PARQUET_ROW_GROUP_ROWS = 512 * 1024
+QUALITY_KEY_PARTITIONS = 256  # on-disk partitions of row-key hashes for the duplicate check
+SCAN_BATCH_ROWS = 128 * 1024  # rows per batch when summarizing or exporting a whole file
+DOWNLOAD_MAX_ROWS = 1_000_000  # larger file exports are done with python -m src.dataset_scan
+SNAPSHOT_DIR = "data/snapshots"  # Every converted release is kept here for revision diffs
 
 # App settings
 APP_TITLE = "European Banking Transparency Dashboard"
@@ -12,9 +34,26 @@ PAGE_LAYOUT = "wide"
 # Chart settings
 DEFAULT_CHART_HEIGHT = 500
 DEFAULT_COLOR_SCHEME = "Plotly"
+CHARTS_PER_PAGE = 8  # Compare page renders metric charts one page at a time
+
+# Automated insights (computed in the background on the Compare page)
+INSIGHT_WORKERS = 4
+INSIGHT_POLL_INTERVAL = 0.5  # seconds between refreshes while insights are pending
 
 # Data caching
-CACHE_TTL = 3600  # 1 hour
+DATA_WATCH_INTERVAL = 10  # seconds between data file checks; 0 disables hot reload
+
+# Query backend for data_processor: "pandas" or "duckdb" (requires the duckdb extra)
+QUERY_BACKEND = "pandas"
+DUCKDB_THREADS = None  # None lets DuckDB use all cores
+
+# Local JSON API (api.py)
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+API_CACHE_SIZE = 256  # Cached responses
+
+# User-defined peer groups (benchmark lines on the Compare page)
+PEER_GROUPS_PATH = "data/peer_groups.json"
 
 # Bank groupings
 BANK_REGIONS = {
@@ -36,6 +75,25 @@ METRIC_CATEGORIES = {
     "NACE Sectors": "NACE",
 }
 
+# Derived ratio metrics, shown as percentages alongside the raw labels.
+# Numerator and denominator are an Item code, optionally restricted to values
+# of other columns; both are summed before dividing at every level.
+DERIVED_METRICS = {
+    "NPE ratio": {
+        "numerator": {"Item": 2520603, "Perf_Status": 2},    # Gross loans, non-performing
+        "denominator": {"Item": 2520603, "Perf_Status": 0},  # Gross loans, total
+    },
+    "NPE coverage ratio": {
+        "numerator": {"Item": 2520613, "Perf_Status": 2},    # Accumulated impairment on non-performing loans
+        "denominator": {"Item": 2520603, "Perf_Status": 2},  # Gross loans, non-performing
+    },
+    "RWA density (SA)": {
+        "numerator": {"Item": 2520531, "Portfolio": 1},      # Risk exposure amount, SA
+        "denominator": {"Item": 2520521, "Portfolio": 1},    # Exposure value, SA
+    },
+}
+DERIVED_ITEM_BASE = 9000000  # Derived metrics get Item codes from here up, in declaration order
+
 # Display formats
 AMOUNT_FORMAT = "{:,.0f}"
 PERCENTAGE_FORMAT = "{:.2f}%"
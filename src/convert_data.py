@@ -1,57 +1,236 @@
-"""Convert CSV data to Parquet format for faster loading."""
-import pandas as pd
+"""Convert CSV data to Parquet format for faster loading.
+
+The CSV is streamed in blocks with the Arrow CSV reader; every batch is cast
+to the target schema and profiled, and row groups are written as they fill
+up, so memory use stays bounded by the block and row-group sizes rather
+than the file size. The quality profile keeps only distinct codes in
+memory and spills row-key hashes to disk for the duplicate check. A first
+pass reads only the Period column, so the ordered Period_Label categories
+are the same in every batch.
+
+Each converted file is also kept as a versioned snapshot for
+``revision_diff``.
+
+Usage: python -m src.convert_data [dataset] [--benchmark] [--no-snapshot]
+"""
+import argparse
+import os
+import time
 from pathlib import Path
 
-def convert_to_parquet():
-    """Convert tr_cre.csv to Parquet format with optimizations."""
-    csv_path = Path('data/tr_cre.csv')
-    parquet_path = Path('data/tr_cre.parquet')
-    
-    print(f"Loading CSV from {csv_path}...")
-    df = pd.read_csv(csv_path)
-    
-    print(f"Original shape: {df.shape}")
-    print(f"Columns: {df.columns.tolist()}")
-    
-    # Optimize data types
-    print("\nOptimizing data types...")
-    
-    # Keep Period as integer for now - will be converted to datetime on load
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from . import config, data_loader, data_quality, revision_diff
+from .dataset_registry import registry
+from .periods import period_columns
+
+# String columns stored as categories (dictionary-encoded)
+CATEGORICAL_COLUMNS = ['LEI_Code', 'NSA', 'Item', 'Label', 'Portfolio', 'Country', 'Sheet', 'Unit']
+
+# Column types enforced while parsing, so type inference on the first block cannot drift
+CSV_COLUMN_TYPES = {
+    'LEI_Code': pa.string(),
+    'NSA': pa.string(),
+    'Label': pa.string(),
+    'Sheet': pa.string(),
+    'Unit': pa.string(),
+    'Item': pa.int64(),
+    'Portfolio': pa.int64(),
+    'Country': pa.int64(),
+    'Period': pa.int32(),
+    'Amount': pa.float32(),
+}
+
+
+def _scan_period_labels(csv_path):
+    """Read the Period column alone and build the sorted labels of every period in the file."""
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=config.CONVERT_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(column_types=CSV_COLUMN_TYPES, include_columns=['Period']),
+    )
+    periods = set()
+    for batch in reader:
+        periods.update(batch.column(0).unique().drop_null().to_pylist())
+    return period_columns(pd.Series(sorted(periods)))[1].cat.categories
+
+
+def _cast_batch(df, period_labels=None):
+    """Cast one batch to the target schema."""
+    # Store Period as a timestamp and its display label as a dictionary column,
+    # so loading needs no per-row conversion
     if 'Period' in df.columns:
-        df['Period'] = df['Period'].astype('int32')
-    
+        df['Period'], df['Period_Label'] = period_columns(df['Period'])
+        if period_labels is not None:
+            # Same ordered categories in every batch, whatever periods the batch holds
+            df['Period_Label'] = df['Period_Label'].cat.set_categories(period_labels, ordered=True)
+
     # Convert string columns to category to save space
-    categorical_cols = ['LEI_Code', 'NSA', 'Item', 'Label', 'Portfolio', 'Country', 'Sheet', 'Unit']
-    for col in categorical_cols:
+    for col in CATEGORICAL_COLUMNS:
         if col in df.columns:
             df[col] = df[col].astype('category')
-            print(f"  {col}: category")
-    
+
     # Ensure Amount is float32
     if 'Amount' in df.columns:
         df['Amount'] = df['Amount'].astype('float32')
-        print(f"  Amount: float32")
-    
-    # Save as Parquet with compression
-    print(f"\nSaving to {parquet_path}...")
-    df.to_parquet(parquet_path, engine='pyarrow', compression='snappy', index=False)
-    
-    # Verify the saved file
+
+    return df
+
+
+def _target_schema(table):
+    """Fix the schema from the first batch, with 32-bit dictionary indices for every category."""
+    fields = [
+        pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type, ordered=f.type.ordered))
+        if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]
+    return pa.schema(fields, metadata=table.schema.metadata)
+
+
+def convert_to_parquet(dataset=config.DEFAULT_DATASET, snapshot=True):
+    """Stream a dataset's CSV to Parquet with optimizations and a stored quality report."""
+    spec = registry.spec(dataset)
+    csv_path = spec.path
+    parquet_path = spec.parquet_path
+    tmp_path = parquet_path.with_suffix('.parquet.tmp')
+
+    print(f"Streaming CSV from {csv_path}...")
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=config.CONVERT_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(column_types=CSV_COLUMN_TYPES),
+    )
+
+    columns = reader.schema.names
+    print(f"Columns: {columns}")
+    missing_cols = [col for col in spec.required_columns if col not in columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    # Period labels are categories ordered over the whole file, so they are collected up front
+    period_labels = _scan_period_labels(csv_path) if 'Period' in columns else None
+
+    # Validate and profile while streaming, so the dashboard never has to rescan
+    quality = data_quality.QualityAccumulator(spec.required_columns)
+    schema = writer = None
+    pending, pending_rows = [], 0
+    start = time.perf_counter()
+
+    def flush(final=False):
+        """Write whole row groups from the pending batches; returns the rows kept back."""
+        table = pa.concat_tables(pending)
+        pending.clear()
+        size = config.PARQUET_ROW_GROUP_ROWS
+        written = len(table) if final else len(table) // size * size
+        if written:
+            writer.write_table(table.slice(0, written), row_group_size=size)
+        if written < len(table):
+            pending.append(table.slice(written))
+        return len(table) - written
+
+    try:
+        for batch in reader:
+            df = _cast_batch(batch.to_pandas(), period_labels)
+            quality.update(df)
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                schema = _target_schema(table)
+                writer = pq.ParquetWriter(tmp_path, schema, compression='snappy')
+            pending.append(table.cast(schema))
+            pending_rows += len(df)
+
+            if pending_rows >= config.PARQUET_ROW_GROUP_ROWS:
+                pending_rows = flush()
+            print(f"  {quality.rows:,} rows", end='\r')
+
+        if writer is None:
+            raise ValueError(f"No rows in {csv_path}")
+        if pending:
+            flush(final=True)
+
+        report = quality.finish()
+        writer.add_key_value_metadata({data_quality.METADATA_KEY: data_quality.encode_report(report)})
+        writer.close()
+        writer = None
+
+        # Replace the previous file in one step, so readers never see a partial file
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    print(f"\nConverted {quality.rows:,} rows in {time.perf_counter() - start:.1f}s")
+    print(f"  Duplicate rows: {report['duplicate_rows']}")
+    print(f"  Missing amounts: {report['columns']['Amount']['nulls']}")
+
+    # Verify the saved file from its footer, without reading the data back
     print("\nVerifying saved file...")
-    df_loaded = pd.read_parquet(parquet_path)
-    print(f"Loaded shape: {df_loaded.shape}")
-    print(f"Period values: {sorted(df_loaded['Period'].unique())}")
-    
+    file_metadata = pq.read_metadata(parquet_path)
+    stored = data_quality.read_quality_report(parquet_path)
+    if file_metadata.num_rows != quality.rows or stored is None:
+        raise ValueError(f"Verification failed: {file_metadata.num_rows:,} rows written, {quality.rows:,} read")
+    print(f"Rows: {file_metadata.num_rows:,} in {file_metadata.num_row_groups} row groups")
+    print(f"Periods: {stored['summary']['date_range']} ({stored['summary']['unique_periods']} periods)")
+
     # Check file sizes
-    csv_size = csv_path.stat().st_size / (1024 * 1024)
+    csv_size = Path(csv_path).stat().st_size / (1024 * 1024)
     parquet_size = parquet_path.stat().st_size / (1024 * 1024)
-    
-    print(f"\nFile sizes:")
+
+    print("\nFile sizes:")
     print(f"  CSV: {csv_size:.2f} MB")
     print(f"  Parquet: {parquet_size:.2f} MB")
     print(f"  Reduction: {(1 - parquet_size/csv_size) * 100:.1f}%")
-    
+
+    if snapshot:
+        snapshot_path, created = revision_diff.save_snapshot(dataset, parquet_path)
+        print(f"\nSnapshot: {snapshot_path}" + ("" if created else " (unchanged, not saved again)"))
+
     print("\n✓ Conversion complete!")
 
+
+def benchmark_load(dataset=config.DEFAULT_DATASET, repeat=3):
+    """Time loading a dataset into the dashboard schema, split into file read and transform."""
+    spec = registry.spec(dataset)
+    path = spec.source_path
+    read = pd.read_parquet if path.suffix == '.parquet' else pd.read_csv
+
+    read_times, load_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read(path)
+        read_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        data_loader._read_dataset(spec)
+        load_times.append(time.perf_counter() - start)
+
+    df = read(path)
+    schema = 'final' if 'Period_Label' in df.columns else 'legacy (Period converted on load)'
+    print(f"Benchmark: {path} ({len(df):,} rows, {schema} schema), best of {repeat}")
+    print(f"  Read file:  {min(read_times):.3f}s")
+    print(f"  Load data:  {min(load_times):.3f}s")
+    print(f"  Transform:  {max(min(load_times) - min(read_times), 0):.3f}s")
+
+
+def main():
+    """Convert a dataset, or benchmark loading it."""
+    parser = argparse.ArgumentParser(description="Convert a dataset CSV to Parquet.")
+    parser.add_argument('dataset', nargs='?', default=config.DEFAULT_DATASET)
+    parser.add_argument('--benchmark', action='store_true', help="Time loading the dataset instead of converting")
+    parser.add_argument('--no-snapshot', action='store_true', help="Do not keep the converted file as a snapshot")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_load(args.dataset)
+    else:
+        convert_to_parquet(args.dataset, snapshot=not args.no_snapshot)
+
+
 if __name__ == '__main__':
-    convert_to_parquet()
+    main()
@@ -0,0 +1,90 @@
+"""Cross-bank metric correlation.
+
+The bank x metric matrix for a period is built with NumPy straight from the
+categorical codes of NSA and Label, and the full metric x metric correlation
+matrix comes from a single ``np.corrcoef`` call. Results are cached per
+(dataset version, period, bank set).
+"""
+import numpy as np
+import pandas as pd
+
+from .cache import versioned_cache
+
+MIN_BANKS = 3
+
+
+def _codes(series):
+    """Get integer codes and their categories for a column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, categories = pd.factorize(series, sort=True)
+    return codes, pd.Index(categories)
+
+
+def build_bank_metric_matrix(df, period, banks=None):
+    """Sum amounts into a bank x metric matrix for one period.
+
+    Returns a DataFrame indexed by NSA with one column per metric label;
+    metrics a bank does not report are 0.
+    """
+    period_rows = (df['Period'] == period).to_numpy()
+    nsa_codes, nsa_categories = _codes(df['NSA'])
+    label_codes, label_categories = _codes(df['Label'])
+
+    nsa_codes = nsa_codes[period_rows]
+    label_codes = label_codes[period_rows]
+    amounts = df['Amount'].to_numpy()[period_rows].astype('float64')
+    valid = (nsa_codes >= 0) & (label_codes >= 0) & ~np.isnan(amounts)
+
+    n_banks, n_metrics = len(nsa_categories), len(label_categories)
+    flat = nsa_codes[valid].astype('int64') * n_metrics + label_codes[valid]
+    matrix = np.bincount(flat, weights=amounts[valid], minlength=n_banks * n_metrics)
+    reported = np.bincount(nsa_codes[valid], minlength=n_banks) > 0
+
+    result = pd.DataFrame(matrix.reshape(n_banks, n_metrics), index=nsa_categories.astype(str),
+                          columns=label_categories.astype(str))
+    result = result[reported]
+    if banks:
+        result = result[result.index.isin(banks)]
+    return result
+
+
+def compute_correlation_matrix(df, period, banks=None, method='pearson'):
+    """Correlate every pair of metrics across banks for one period.
+
+    Metrics that do not vary across the banks are dropped. ``method`` is
+    'pearson' on amounts or 'spearman' on per-metric ranks.
+    """
+    matrix = build_bank_metric_matrix(df, period, banks)
+    if len(matrix) < MIN_BANKS:
+        return pd.DataFrame()
+
+    values = matrix.to_numpy()
+    varying = values.std(axis=0) > 0
+    values = values[:, varying]
+    if method == 'spearman':
+        values = pd.DataFrame(values).rank().to_numpy()
+
+    corr = np.corrcoef(values, rowvar=False)
+    labels = matrix.columns[varying]
+    return pd.DataFrame(np.atleast_2d(corr), index=labels, columns=labels)
+
+
+@versioned_cache(maxsize=32)
+def get_correlation_matrix(df, period, banks=None, method='pearson'):
+    """Get the metric correlation matrix, cached per dataset version, period and bank set."""
+    return compute_correlation_matrix(df, period, banks, method)
+
+
+def get_top_pairs(corr, metrics=None, n=10):
+    """Get the most strongly correlated metric pairs (by absolute correlation)."""
+    if corr.empty:
+        return pd.DataFrame(columns=['Metric A', 'Metric B', 'Correlation'])
+    if metrics:
+        keep = [m for m in corr.index if m in set(metrics)]
+        corr = corr.loc[keep, keep]
+
+    upper = np.triu(np.ones(corr.shape, dtype=bool), k=1)
+    pairs = corr.where(upper).stack().reset_index()
+    pairs.columns = ['Metric A', 'Metric B', 'Correlation']
+    return pairs.reindex(pairs['Correlation'].abs().sort_values(ascending=False).index).head(n)
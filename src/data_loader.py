@@ -1,51 +1,91 @@
 """Data loading and caching module."""
 
-from pathlib import Path
-
 import pandas as pd
 import streamlit as st
 
-from . import config
+from . import config, data_quality, dataset_scan, derived_metrics
+from .cache import versioned_cache
+from .dataset_registry import registry
+from .periods import period_columns
+
+
+def _read_dataset(spec):
+    """Read a dataset file and prepare it for the dashboard. Prefers Parquet over CSV."""
+    source_path = spec.source_path
+    if source_path.suffix == '.parquet':
+        df = pd.read_parquet(source_path)
+    else:
+        df = pd.read_csv(source_path)
+
+    # Basic data validation (already done at conversion when the file carries a quality report)
+    report = data_quality.read_quality_report(source_path)
+    columns = report['columns'] if report else df.columns
+    missing_cols = [col for col in spec.required_columns if col not in columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    # Files written by convert_data are already in the final schema; older files
+    # and CSVs are converted once per distinct period rather than once per row
+    if 'Period_Label' not in df.columns:
+        df['Period'], df['Period_Label'] = period_columns(df['Period'])
+
+    return df
 
 
-@st.cache_data(ttl=config.CACHE_TTL, show_spinner=False)
-def load_data():
-    """Load the main transparency data with caching. Prefers Parquet over CSV."""
+def get_dataset(dataset=config.DEFAULT_DATASET):
+    """Get a loaded dataset outside the dashboard; load errors are raised.
+
+    Raises KeyError for unknown datasets, FileNotFoundError for a missing
+    file and the parse error for an unreadable one.
+    """
+    return registry.get(dataset, _read_dataset)
+
+
+def load_data(dataset=config.DEFAULT_DATASET):
+    """Load a dataset; it is read lazily on first use and shared across sessions."""
     try:
-        data_path = Path(config.DATA_PATH)
-        parquet_path = data_path.with_suffix('.parquet')
-
-        # Try loading Parquet first (faster)
-        if parquet_path.exists():
-            df = pd.read_parquet(parquet_path)
-        else:
-            # Fall back to CSV
-            df = pd.read_csv(config.DATA_PATH)
-
-        # Basic data validation
-        required_columns = ['LEI_Code', 'NSA', 'Period', 'Item', 'Label',
-                          'Portfolio', 'Country', 'Amount', 'Sheet']
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            st.error(f"Missing required columns: {missing_cols}")
-            return None
-
-        # Convert Period to datetime if needed (handles both integer and string formats)
-        if 'Period' in df.columns and df['Period'].dtype != 'datetime64[ns]':
-            df['Period'] = pd.to_datetime(df['Period'].astype(str), format='%Y%m')
-
-        df['Period_Label'] = df['Period'].dt.strftime('%b %Y')
-
-        return df
+        return get_dataset(dataset)
+    except KeyError:
+        st.error(f"Unknown dataset: {dataset}")
+        return None
     except FileNotFoundError:
-        st.error(f"Data file not found: {config.DATA_PATH}")
+        st.error(f"Data file not found: {registry.spec(dataset).path}")
         return None
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None
 
 
-@st.cache_data(show_spinner=False)
+def get_datasets():
+    """Get names of the datasets that have a data file available."""
+    return registry.names(available_only=True)
+
+
+def get_dataset_title(dataset):
+    """Get the display title of a dataset."""
+    return registry.spec(dataset).title
+
+
+def get_source_path(df):
+    """Get the file a dataset frame was loaded from (None for filtered copies)."""
+    spec = registry.spec_of(df)
+    return spec.source_path if spec is not None else None
+
+
+def get_quality_report(df):
+    """Get the quality report stored at conversion for a dataset frame (None if unavailable)."""
+    spec = registry.spec_of(df)
+    if spec is None:
+        return None
+    return data_quality.read_quality_report(spec.source_path)
+
+
+def dataset_version(df):
+    """Get the version id of a dataset frame returned by load_data (None for other frames)."""
+    return registry.version_of(df)
+
+
+@versioned_cache(maxsize=64)
 def get_unique_values(df, column):
     """Get unique values from a column with caching."""
     if df is None or column not in df.columns:
@@ -53,64 +93,83 @@ def get_unique_values(df, column):
     return sorted(df[column].unique().tolist())
 
 
-@st.cache_data(show_spinner=False)
-def get_banks():
-    """Get list of all banks."""
-    df = load_data()
+@versioned_cache(maxsize=32)
+def _sorted_values(df, column):
+    """Sorted distinct values of a column, cached per dataset version."""
+    return sorted(df[column].unique().tolist())
+
+
+def _dataset_values(dataset, column):
+    """Get the sorted distinct values of a column, cached per dataset version."""
+    df = load_data(dataset)
     if df is None:
         return []
-    # Use set for faster unique operation, then sort
-    return sorted(set(df['NSA'].tolist()))
+    return _sorted_values(df, column)
+
+
+def get_banks(dataset=config.DEFAULT_DATASET):
+    """Get list of all banks."""
+    return _dataset_values(dataset, 'NSA')
 
 
-@st.cache_data(show_spinner=False)
-def get_periods():
+def get_periods(dataset=config.DEFAULT_DATASET):
     """Get list of all time periods."""
-    df = load_data()
-    if df is None:
-        return []
-    return sorted(df['Period'].unique())
+    return _dataset_values(dataset, 'Period')
 
 
-@st.cache_data(show_spinner=False)
-def get_metrics():
+def get_metrics(dataset=config.DEFAULT_DATASET):
     """Get list of all metrics."""
-    df = load_data()
-    if df is None:
-        return []
-    # Use set for faster unique operation, then sort
-    return sorted(set(df['Label'].tolist()))
+    return _dataset_values(dataset, 'Label')
 
 
-@st.cache_data(show_spinner=False)
-def get_sheets():
-    """Get list of all sheet categories."""
-    df = load_data()
-    if df is None:
-        return []
-    return sorted(df['Sheet'].unique().tolist())
+@versioned_cache(maxsize=8)
+def get_item_labels(df):
+    """Map every Item code of a dataset, and of its derived metrics, to its label."""
+    if df is None or 'Item' not in df.columns:
+        return {}
+    items = df.groupby('Item', observed=True)['Label'].first()
+    labels = dict(zip(items.index.tolist(), items.astype(str).tolist(), strict=True))
+    derived = derived_metrics.get_item_labels()
+    labels.update({item: derived[item] for item in derived_metrics.get_available_items(df)})
+    return labels
+
 
+def get_item_codes(df, labels):
+    """Resolve metric labels to Item codes, skipping unknown labels."""
+    codes = {label: item for item, label in get_item_labels(df).items()}
+    return [codes[label] for label in labels if label in codes]
 
-def filter_data(df, banks=None, periods=None, metrics=None, sheets=None):
-    """Filter dataframe based on selections."""
+
+def get_items(dataset=config.DEFAULT_DATASET):
+    """Get all metric Item codes, ordered by label."""
+    df = load_data(dataset)
     if df is None:
-        return None
+        return []
+    labels = get_item_labels(df)
+    return sorted((item for item in labels if not derived_metrics.is_derived(item)), key=labels.get)
 
-    filtered_df = df.copy()
 
-    if banks:
-        filtered_df = filtered_df[filtered_df['NSA'].isin(banks)]
+def get_sheets(dataset=config.DEFAULT_DATASET):
+    """Get list of all sheet categories."""
+    return _dataset_values(dataset, 'Sheet')
 
-    if periods:
-        filtered_df = filtered_df[filtered_df['Period'].isin(periods)]
 
-    if metrics:
-        filtered_df = filtered_df[filtered_df['Label'].isin(metrics)]
+def filter_data(df, banks=None, periods=None, items=None, sheets=None, portfolios=None, countries=None):
+    """Filter dataframe based on selections (metrics as Item codes)."""
+    if df is None:
+        return None
 
-    if sheets:
-        filtered_df = filtered_df[filtered_df['Sheet'].isin(sheets)]
+    # One combined mask, so the frame is copied once
+    mask = pd.Series(True, index=df.index)
+    selections = {
+        'NSA': banks, 'Period': periods, 'Item': items,
+        'Sheet': sheets, 'Portfolio': portfolios, 'Country': countries,
+    }
+    for column, values in selections.items():
+        if values:
+            mask &= df[column].isin(values)
 
-    return filtered_df
+    return df[mask]
 
 
 def get_data_summary(df):
@@ -118,6 +177,15 @@ def get_data_summary(df):
     if df is None:
         return {}
 
+    # Full datasets carry the summary computed at conversion, or are scanned from their file
+    report = get_quality_report(df)
+    if report and 'summary' in report:
+        return dict(report['summary'])
+    source_path = get_source_path(df)
+    summary = dataset_scan.get_file_summary(source_path) if source_path is not None else None
+    if summary is not None:
+        return dict(summary)
+
     return {
         'total_rows': len(df),
         'unique_banks': df['NSA'].nunique(),
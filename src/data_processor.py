@@ -1,5 +1,11 @@
 """Data processing and transformation utilities."""
-import streamlit as st
+from . import config, duckdb_backend
+from .cache import versioned_cache
+
+
+def _use_duckdb():
+    """Check whether queries should run on the DuckDB backend."""
+    return config.QUERY_BACKEND == 'duckdb' and duckdb_backend.is_available()
 
 
 def calculate_bank_sizes(df):
@@ -8,7 +14,7 @@ def calculate_bank_sizes(df):
         return {}
 
     # Calculate total amounts by bank
-    bank_totals = df.groupby('NSA')['Amount'].sum().sort_values(ascending=False)
+    bank_totals = df.groupby('NSA', observed=True)['Amount'].sum().sort_values(ascending=False)
 
     # Categorize by quantiles
     quantiles = bank_totals.quantile([0.33, 0.67])
@@ -25,28 +31,27 @@ def calculate_bank_sizes(df):
     return size_dict
 
 
-@st.cache_data
+@versioned_cache(maxsize=8)
 def get_metrics_by_category(df):
-    """Group metrics by their sheet categories."""
+    """Group metrics (Item codes) by their sheet categories."""
     if df is None or df.empty:
         return {}
 
-    metrics_by_sheet = {}
-    for sheet in df['Sheet'].unique():
-        sheet_metrics = df[df['Sheet'] == sheet]['Label'].unique().tolist()
-        metrics_by_sheet[sheet] = sorted(sheet_metrics)
-
-    return metrics_by_sheet
+    items = df.groupby('Sheet', observed=True)['Item'].unique()
+    return {sheet: sorted(values.tolist()) for sheet, values in items.items()}
 
 
-def prepare_comparison_data(df, banks, metric, periods=None):
-    """Prepare data for bank comparison on a single metric."""
+def prepare_comparison_data(df, banks, item, periods=None):
+    """Prepare data for bank comparison on a single metric (Item code)."""
     if df is None or df.empty:
         return None
 
+    if _use_duckdb():
+        return duckdb_backend.prepare_comparison_data(df, banks, item, periods)
+
     filtered_df = df[
         (df['NSA'].isin(banks)) &
-        (df['Label'] == metric)
+        (df['Item'] == item)
     ]
 
     if periods:
@@ -57,40 +62,47 @@ def prepare_comparison_data(df, banks, metric, periods=None):
         index='Period',
         columns='NSA',
         values='Amount',
-        aggfunc='sum'
+        aggfunc='sum',
+        observed=True
     )
 
     return pivot_df
 
 
-def prepare_metric_comparison_data(df, bank, metrics, period=None):
-    """Prepare data for metric comparison for a single bank."""
+def prepare_metric_comparison_data(df, bank, items, period=None):
+    """Prepare data for metric (Item code) comparison for a single bank."""
     if df is None or df.empty:
         return None
 
+    if _use_duckdb():
+        return duckdb_backend.prepare_metric_comparison_data(df, bank, items, period)
+
     filtered_df = df[
         (df['NSA'] == bank) &
-        (df['Label'].isin(metrics))
+        (df['Item'].isin(items))
     ]
 
     if period:
         filtered_df = filtered_df[filtered_df['Period'] == period]
 
     # Group by metric and sum amounts
-    summary_df = filtered_df.groupby('Label')['Amount'].sum().reset_index()
-    summary_df.columns = ['Metric', 'Amount']
+    summary_df = filtered_df.groupby('Item', observed=True)['Amount'].sum().reset_index()
+    summary_df.columns = ['Item', 'Amount']
 
     return summary_df.sort_values('Amount', ascending=False)
 
 
-def calculate_period_change(df, banks, metric):
-    """Calculate period-over-period changes for selected banks and metric."""
+def calculate_period_change(df, banks, item):
+    """Calculate period-over-period changes for selected banks and metric (Item code)."""
     if df is None or df.empty:
         return None
 
+    if _use_duckdb():
+        return duckdb_backend.calculate_period_change(df, banks, item)
+
     filtered_df = df[
         (df['NSA'].isin(banks)) &
-        (df['Label'] == metric)
+        (df['Item'] == item)
     ]
 
     # Pivot and calculate changes
@@ -98,7 +110,8 @@ def calculate_period_change(df, banks, metric):
         index='Period',
         columns='NSA',
         values='Amount',
-        aggfunc='sum'
+        aggfunc='sum',
+        observed=True
     ).sort_index()
 
     # Calculate percentage change
@@ -107,33 +120,39 @@ def calculate_period_change(df, banks, metric):
     return pct_change_df
 
 
-def get_top_banks(df, metric, period, n=10):
-    """Get top N banks for a specific metric and period."""
+def get_top_banks(df, item, period, n=10):
+    """Get top N banks for a specific metric (Item code) and period."""
     if df is None or df.empty:
         return []
 
+    if _use_duckdb():
+        return duckdb_backend.get_top_banks(df, item, period, n)
+
     filtered_df = df[
-        (df['Label'] == metric) &
+        (df['Item'] == item) &
         (df['Period'] == period)
     ]
 
-    bank_totals = filtered_df.groupby('NSA')['Amount'].sum().sort_values(ascending=False)
+    bank_totals = filtered_df.groupby('NSA', observed=True)['Amount'].sum().sort_values(ascending=False)
 
     return bank_totals.head(n).index.tolist()
 
 
-def calculate_statistics(df, banks, metric, period):
-    """Calculate statistical summary for selected banks and metric."""
+def calculate_statistics(df, banks, item, period):
+    """Calculate statistical summary for selected banks and metric (Item code)."""
     if df is None or df.empty:
         return {}
 
+    if _use_duckdb():
+        return duckdb_backend.calculate_statistics(df, banks, item, period)
+
     filtered_df = df[
         (df['NSA'].isin(banks)) &
-        (df['Label'] == metric) &
+        (df['Item'] == item) &
         (df['Period'] == period)
     ]
 
-    amounts = filtered_df.groupby('NSA')['Amount'].sum()
+    amounts = filtered_df.groupby('NSA', observed=True)['Amount'].sum()
 
     return {
         'mean': amounts.mean(),
@@ -146,24 +165,28 @@ def calculate_statistics(df, banks, metric, period):
     }
 
 
-def prepare_heatmap_data(df, banks, metrics, period):
-    """Prepare data for heatmap visualization (banks x metrics)."""
+def prepare_heatmap_data(df, banks, items, period):
+    """Prepare data for heatmap visualization (metrics as Item codes x banks)."""
     if df is None or df.empty:
         return None
 
+    if _use_duckdb():
+        return duckdb_backend.prepare_heatmap_data(df, banks, items, period)
+
     filtered_df = df[
         (df['NSA'].isin(banks)) &
-        (df['Label'].isin(metrics)) &
+        (df['Item'].isin(items)) &
         (df['Period'] == period)
     ]
 
     # Pivot to create matrix
     heatmap_df = filtered_df.pivot_table(
-        index='Label',
+        index='Item',
         columns='NSA',
         values='Amount',
         aggfunc='sum',
-        fill_value=0
+        fill_value=0,
+        observed=True
     )
 
     return heatmap_df
@@ -0,0 +1,182 @@
+"""Ingest-time validation, quality report and summary statistics.
+
+The report is computed once by ``convert_data`` and stored as JSON in the
+Parquet file's key-value metadata, so the dashboard reads it from the file
+footer instead of rescanning the data on every render.
+"""
+import json
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from . import config
+from .fingerprint import stat_signature
+
+METADATA_KEY = b'p3dh.quality'
+
+REPORT_VERSION = 1
+
+
+def format_period(value):
+    """Format a Period value (YYYYMM integer or datetime) as 'Mon YYYY'."""
+    if not isinstance(value, pd.Timestamp):
+        value = pd.to_datetime(str(int(value)), format='%Y%m')
+    return value.strftime('%b %Y')
+
+
+def _tracks_distinct(series):
+    """Whether distinct values of a column are counted; float measures are (almost) all distinct."""
+    return not pd.api.types.is_float_dtype(series.dtype)
+
+
+class QualityAccumulator:
+    """Build a quality report incrementally from DataFrame batches.
+
+    Null counts, ranges and sums are folded per batch. Distinct values are
+    kept for code and key columns only, so they grow with the number of
+    banks, periods and metrics, not with the rows. Duplicates are rows that
+    repeat another row on every column except Amount, i.e. the same data
+    point reported more than once: row-key hashes are spilled to
+    ``config.QUALITY_KEY_PARTITIONS`` files on disk by hash, and ``finish``
+    counts repeats one partition at a time.
+    """
+
+    def __init__(self, required_columns=()):
+        self.required_columns = tuple(required_columns)
+        self.rows = 0
+        self.columns = {}
+        self._uniques = {}
+        self._spill_dir = None
+        self._amount_sum = 0.0
+        self._amount_count = 0
+
+    def update(self, df):
+        """Fold one batch into the report."""
+        self.rows += len(df)
+        for col in df.columns:
+            series = df[col]
+            stats = self.columns.setdefault(col, {'dtype': str(series.dtype), 'nulls': 0})
+            stats['nulls'] += int(series.isna().sum())
+            if _tracks_distinct(series):
+                self._uniques.setdefault(col, set()).update(pd.unique(series.dropna().to_numpy()).tolist())
+
+            numeric = pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype)
+            if numeric or pd.api.types.is_datetime64_any_dtype(series):
+                if series.isna().all():
+                    stats.setdefault('min', None)
+                    stats.setdefault('max', None)
+                else:
+                    low, high = series.min(), series.max()
+                    if numeric:
+                        low, high = float(low), float(high)
+                    stats['min'] = low if stats.get('min') is None else min(stats['min'], low)
+                    stats['max'] = high if stats.get('max') is None else max(stats['max'], high)
+
+        key_columns = [col for col in df.columns if col != 'Amount']
+        self._spill_key_hashes(pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy())
+
+        if 'Amount' in df.columns:
+            self._amount_sum += float(df['Amount'].astype('float64').sum())
+            self._amount_count += int(df['Amount'].count())
+
+    def _spill_key_hashes(self, hashes):
+        """Append a batch's row-key hashes to their partition files."""
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(prefix='p3dh-keys-')
+        partitions = hashes % config.QUALITY_KEY_PARTITIONS
+        order = np.argsort(partitions, kind='stable')
+        bounds = np.searchsorted(partitions[order], np.arange(config.QUALITY_KEY_PARTITIONS + 1))
+        for partition in range(config.QUALITY_KEY_PARTITIONS):
+            start, end = bounds[partition], bounds[partition + 1]
+            if start < end:
+                with open(Path(self._spill_dir.name) / f"{partition}.bin", 'ab') as f:
+                    hashes[order[start:end]].tofile(f)
+
+    def _count_duplicates(self):
+        """Count repeated row keys, reading one partition file at a time."""
+        if self._spill_dir is None:
+            return 0
+        try:
+            duplicates = 0
+            for path in Path(self._spill_dir.name).glob('*.bin'):
+                hashes = np.fromfile(path, dtype='uint64')
+                duplicates += len(hashes) - len(pd.unique(hashes))
+            return duplicates
+        finally:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+
+    def finish(self):
+        """Resolve distinct counts and duplicates and return the report dict."""
+        columns = {}
+        for col, stats in self.columns.items():
+            stats = dict(stats)
+            values = self._uniques.get(col)
+            stats['unique'] = len(values) if values is not None else None
+            if isinstance(stats.get('min'), pd.Timestamp):
+                stats['min'], stats['max'] = stats['min'].isoformat(), stats['max'].isoformat()
+            columns[col] = stats
+
+        report = {
+            'version': REPORT_VERSION,
+            'missing_columns': [col for col in self.required_columns if col not in columns],
+            'rows': self.rows,
+            'duplicate_rows': int(self._count_duplicates()),
+            'columns': columns,
+        }
+
+        if not report['missing_columns']:
+            period = self.columns['Period']
+            report['summary'] = {
+                'total_rows': self.rows,
+                'unique_banks': columns['NSA']['unique'],
+                'unique_periods': columns['Period']['unique'],
+                'unique_metrics': columns['Label']['unique'],
+                'date_range': f"{format_period(period['min'])} - {format_period(period['max'])}",
+                'total_amount': self._amount_sum,
+                'avg_amount': self._amount_sum / self._amount_count if self._amount_count else float('nan'),
+            }
+
+        return report
+
+
+def build_quality_report(df, required_columns=()):
+    """Validate a dataset and compute its quality report and summary in one go."""
+    accumulator = QualityAccumulator(required_columns)
+    accumulator.update(df)
+    return accumulator.finish()
+
+
+def encode_report(report):
+    """Serialize a quality report for Parquet key-value metadata."""
+    return json.dumps(report).encode('utf-8')
+
+
+def attach_quality_report(table, report):
+    """Add a quality report to an Arrow table's schema metadata."""
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = encode_report(report)
+    return table.replace_schema_metadata(metadata)
+
+
+@lru_cache(maxsize=16)
+def _read_report(path, signature):
+    """Read the report from a Parquet footer; cached per file signature."""
+    metadata = pq.read_metadata(path).metadata or {}
+    raw = metadata.get(METADATA_KEY)
+    if raw is None:
+        return None
+    report = json.loads(raw)
+    return report if report.get('version') == REPORT_VERSION else None
+
+
+def read_quality_report(path):
+    """Get the stored quality report of a Parquet file, or None if it has none."""
+    signature = stat_signature(path)
+    if signature is None or str(path).endswith('.csv'):
+        return None
+    return _read_report(str(path), signature)
@@ -0,0 +1,273 @@
+"""Registry of transparency-exercise datasets with lazy loading and eviction.
+
+Each template is declared once in ``config.DATASETS``. A dataset is only
+read from disk the first time a page asks for it, is shared across sessions
+afterwards, and the least recently used datasets are evicted when the loaded
+total exceeds ``config.DATASET_MEMORY_LIMIT_MB``.
+
+A loaded dataset is keyed on its file fingerprint. A background watcher
+polls the files every ``config.DATA_WATCH_INTERVAL`` seconds; when one
+changes, the new version is loaded off the request path and swapped in
+atomically. Sessions keep the frame they already hold until their next
+rerun, and derived caches keyed by version pick up the new one.
+
+Loading is single-flight: when many sessions ask for a dataset that is not
+loaded yet (e.g. right after a restart), the first one reads the file and
+the others wait for and share its result instead of each parsing it.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import config
+from .fingerprint import file_fingerprint, stat_signature
+
+logger = logging.getLogger(__name__)
+
+BASE_REQUIRED_COLUMNS = ('LEI_Code', 'NSA', 'Period', 'Item', 'Label', 'Amount', 'Sheet')
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Declaration of one dataset (template) file."""
+
+    name: str
+    title: str
+    path: str
+    required_columns: tuple = BASE_REQUIRED_COLUMNS
+
+    @property
+    def parquet_path(self):
+        return Path(self.path).with_suffix('.parquet')
+
+    @property
+    def source_path(self):
+        """Path that will be read: the Parquet sibling if present, else the CSV."""
+        return self.parquet_path if self.parquet_path.exists() else Path(self.path)
+
+    def is_available(self):
+        return self.source_path.exists()
+
+
+@dataclass
+class _Entry:
+    df: object
+    version: str
+    nbytes: int
+    path: Path
+    signature: tuple
+    loader: Callable
+
+
+class DatasetRegistry:
+    """Thread-safe, process-wide cache of loaded datasets."""
+
+    def __init__(self, memory_limit_mb=None, watch_interval=None):
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+        self.watch_interval = watch_interval
+        self._specs = {}
+        self._entries = OrderedDict()
+        self._loading = {}  # name -> Future of the load in progress
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def register(self, spec):
+        """Declare a dataset; replaces any previous spec with the same name."""
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._entries.pop(spec.name, None)
+            self._loading.pop(spec.name, None)
+
+    def spec(self, name):
+        """Get the spec for a dataset; raises KeyError for unknown names."""
+        return self._specs[name]
+
+    def names(self, available_only=True):
+        """Get registered dataset names, optionally only those with a file on disk."""
+        return [name for name, spec in self._specs.items()
+                if not available_only or spec.is_available()]
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._entries
+
+    def get(self, name, loader):
+        """Get a loaded dataset, calling ``loader(spec)`` on first use.
+
+        Concurrent callers of a dataset that is not loaded yet share one
+        load: the first caller reads the file, the others wait for it and
+        get the same frame (or the same exception).
+        """
+        spec = self._specs[name]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                return entry.df
+            future = self._loading.get(name)
+            leader = future is None
+            if leader:
+                future = self._loading[name] = Future()
+
+        if not leader:
+            return future.result()
+
+        # Parse outside the lock so loading one template does not block the others
+        try:
+            entry = self._load(spec, loader)
+        except BaseException as e:
+            with self._lock:
+                if self._loading.get(name) is future:
+                    del self._loading[name]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Skip installing if the dataset was re-registered while loading
+            if self._loading.get(name) is future:
+                del self._loading[name]
+                self._entries[name] = entry
+                self._entries.move_to_end(name)
+                self._enforce_memory_limit(keep=name)
+        future.set_result(entry.df)
+
+        self._ensure_watcher()
+        return entry.df
+
+    def _load(self, spec, loader):
+        """Read a dataset file into a new entry."""
+        path = spec.source_path
+        signature = stat_signature(path)
+        version = file_fingerprint(path)
+        df = loader(spec)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        return _Entry(df, version, nbytes, path, signature, loader)
+
+    def check_for_updates(self):
+        """Reload loaded datasets whose file changed and swap them in.
+
+        A changed size or mtime triggers a content fingerprint; only a new
+        fingerprint triggers a reload. Returns the names that were swapped.
+        """
+        with self._lock:
+            candidates = [
+                (name, entry) for name, entry in self._entries.items()
+                if self._specs[name].source_path != entry.path
+                or stat_signature(entry.path) != entry.signature
+            ]
+
+        swapped = []
+        for name, entry in candidates:
+            spec = self._specs[name]
+            if not spec.is_available():
+                continue
+            if spec.source_path == entry.path and file_fingerprint(entry.path) == entry.version:
+                # Touched but unchanged: remember the new signature only
+                with self._lock:
+                    if self._entries.get(name) is entry:
+                        entry.signature = stat_signature(entry.path)
+                continue
+
+            new_entry = self._load(spec, entry.loader)
+            with self._lock:
+                # Skip if the dataset was evicted or replaced while loading
+                if self._entries.get(name) is entry:
+                    self._entries[name] = new_entry
+                    self._enforce_memory_limit(keep=name)
+                    swapped.append(name)
+
+        return swapped
+
+    def _ensure_watcher(self):
+        """Start the background file watcher once, if enabled."""
+        if not self.watch_interval:
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name='dataset-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        """Poll loaded datasets for file changes until the process exits."""
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                self.check_for_updates()
+            except Exception:
+                # Keep serving the current version; retry on the next poll
+                logger.exception("Dataset reload failed")
+
+    def evict(self, name):
+        """Drop a loaded dataset from memory."""
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def version(self, name):
+        """Get the version of a loaded dataset, or None if it is not loaded."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry.version if entry is not None else None
+
+    def version_of(self, df):
+        """Get the version of a DataFrame handed out by the registry.
+
+        Only the exact object returned by ``get`` has a version; filtered
+        copies return None.
+        """
+        with self._lock:
+            name = self._name_of(df)
+            return self._entries[name].version if name is not None else None
+
+    def spec_of(self, df):
+        """Get the spec of a DataFrame handed out by the registry, or None."""
+        with self._lock:
+            name = self._name_of(df)
+        return self._specs[name] if name is not None else None
+
+    def _name_of(self, df):
+        """Find the dataset name of a loaded frame by identity (lock held)."""
+        for name, entry in self._entries.items():
+            if entry.df is df:
+                return name
+        return None
+
+    def memory_usage(self):
+        """Get loaded bytes per dataset, least recently used first."""
+        with self._lock:
+            return {name: entry.nbytes for name, entry in self._entries.items()}
+
+    def _enforce_memory_limit(self, keep):
+        """Evict least recently used datasets until under the memory limit (lock held)."""
+        if not self.memory_limit_bytes:
+            return
+        total = sum(entry.nbytes for entry in self._entries.values())
+        for name in list(self._entries):
+            if total <= self.memory_limit_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._entries.pop(name).nbytes
+
+
+def build_registry():
+    """Create a registry with every dataset declared in config."""
+    registry = DatasetRegistry(memory_limit_mb=config.DATASET_MEMORY_LIMIT_MB,
+                               watch_interval=config.DATA_WATCH_INTERVAL)
+    for name, declaration in config.DATASETS.items():
+        registry.register(DatasetSpec(
+            name=name,
+            title=declaration['title'],
+            path=declaration['path'],
+            required_columns=BASE_REQUIRED_COLUMNS + tuple(declaration.get('extra_columns', ())),
+        ))
+    return registry
+
+
+registry = build_registry()
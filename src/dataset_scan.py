@@ -0,0 +1,187 @@
+"""Out-of-core scans of dataset files in bounded memory.
+
+Summaries and full exports read the file in record batches instead of
+working on the loaded frame: running sums and counts are folded per batch,
+distinct counts keep only the distinct values, and exports are written as
+each batch arrives. Memory use is bounded by ``config.SCAN_BATCH_ROWS`` and
+the number of distinct banks, periods and metrics, not by the file size.
+
+Exports written here go straight to disk. The dashboard download buttons
+hold the finished file in memory, so large exports are done from the CLI:
+
+Usage: python -m src.dataset_scan [dataset or file] --output PATH.csv|PATH.xlsx [--bank NSA ...]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from . import config, data_quality
+from .dataset_registry import registry
+from .fingerprint import stat_signature
+from .periods import period_columns
+
+# Excel's row limit, less the header row
+EXCEL_MAX_ROWS = 1048575
+
+
+def iter_batches(path, columns=None, banks=None):
+    """Yield a dataset file as DataFrame batches, optionally limited to some banks (NSA codes)."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        batches = pq.ParquetFile(path).iter_batches(batch_size=config.SCAN_BATCH_ROWS, columns=columns)
+    else:
+        batches = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=config.CONVERT_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(include_columns=columns),
+        )
+
+    for batch in batches:
+        df = batch.to_pandas()
+        if banks:
+            df = df[df['NSA'].isin(banks)]
+        if not df.empty:
+            yield df
+
+
+def _prepare_batch(df):
+    """Bring a batch to the loaded dataset schema (Period as datetime plus its label)."""
+    if 'Period' in df.columns and 'Period_Label' not in df.columns:
+        df['Period'], df['Period_Label'] = period_columns(df['Period'])
+    return df
+
+
+def scan_summary(path):
+    """Compute the data summary of a dataset file batch by batch."""
+    rows = amount_count = 0
+    amount_sum = 0.0
+    distinct = {'NSA': set(), 'Period': set(), 'Label': set()}
+
+    for df in iter_batches(path, columns=['NSA', 'Period', 'Label', 'Amount']):
+        rows += len(df)
+        amount_sum += float(df['Amount'].astype('float64').sum())
+        amount_count += int(df['Amount'].count())
+        for col, values in distinct.items():
+            values.update(df[col].dropna().unique().tolist())
+
+    periods = distinct['Period']
+    return {
+        'total_rows': rows,
+        'unique_banks': len(distinct['NSA']),
+        'unique_periods': len(periods),
+        'unique_metrics': len(distinct['Label']),
+        'date_range': (f"{data_quality.format_period(min(periods))} - "
+                       f"{data_quality.format_period(max(periods))}" if periods else ''),
+        'total_amount': amount_sum,
+        'avg_amount': amount_sum / amount_count if amount_count else float('nan'),
+    }
+
+
+@lru_cache(maxsize=16)
+def _cached_summary(path, signature):
+    """Scan a file's summary; cached per file signature."""
+    return scan_summary(path)
+
+
+def get_file_summary(path):
+    """Get the data summary of a dataset file, rescanned only when the file changes."""
+    signature = stat_signature(path)
+    if signature is None:
+        return None
+    return _cached_summary(str(path), signature)
+
+
+def count_rows(path, banks=None):
+    """Count the rows of a dataset file, optionally only those of some banks."""
+    if not banks and Path(path).suffix == '.parquet':
+        return pq.read_metadata(path).num_rows
+    return sum(len(df) for df in iter_batches(path, columns=['NSA'], banks=banks))
+
+
+@lru_cache(maxsize=64)
+def _cached_row_count(path, signature, banks):
+    """Count a file's rows; cached per file signature and banks."""
+    return count_rows(path, banks)
+
+
+def get_row_count(path, banks=None):
+    """Get the row count of a dataset file (optionally some banks), recounted only when the file changes."""
+    return _cached_row_count(str(path), stat_signature(path), tuple(sorted(banks)) if banks else None)
+
+
+def export_csv(path, banks=None):
+    """Stream a dataset file (optionally some banks) to CSV.
+
+    Returns an open temporary file positioned at the start.
+    """
+    output = tempfile.TemporaryFile(suffix='.csv')
+    header = True
+    for df in iter_batches(path, banks=banks):
+        output.write(_prepare_batch(df).to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+
+    output.seek(0)
+    return output
+
+
+def export_excel(path, banks=None):
+    """Stream a dataset file (optionally some banks) to an Excel workbook.
+
+    Rows are appended through a write-only workbook; data beyond Excel's
+    row limit continues on further sheets. Returns an open temporary file
+    positioned at the start.
+    """
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets = None, 0, 0
+
+    for df in iter_batches(path, banks=banks):
+        df = _prepare_batch(df)
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            if sheet is None or sheet_rows == EXCEL_MAX_ROWS:
+                sheets += 1
+                sheet = workbook.create_sheet('Data' if sheets == 1 else f'Data {sheets}')
+                sheet.append(list(df.columns))
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+
+    if sheet is None:
+        workbook.create_sheet('Data')
+
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def main():
+    """Export a dataset file, optionally some banks, to CSV or Excel."""
+    parser = argparse.ArgumentParser(description="Export a dataset file in bounded memory.")
+    parser.add_argument('source', nargs='?', default=config.DEFAULT_DATASET, help="Dataset name or data file")
+    parser.add_argument('--output', required=True, help="Output file (.csv or .xlsx)")
+    parser.add_argument('--bank', action='append', dest='banks', help="Bank NSA code (repeatable, default: all)")
+    args = parser.parse_args()
+
+    path = registry.spec(args.source).source_path if args.source in registry.names() else Path(args.source)
+    if not path.exists():
+        parser.error(f"No data file for {args.source}")
+    suffix = Path(args.output).suffix.lower()
+    if suffix not in ('.csv', '.xlsx'):
+        parser.error("--output must end in .csv or .xlsx")
+
+    start = time.perf_counter()
+    export = export_excel if suffix == '.xlsx' else export_csv
+    with export(path, args.banks) as exported, open(args.output, 'wb') as output:
+        shutil.copyfileobj(exported, output)
+    print(f"✓ {path} exported to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
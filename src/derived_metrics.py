@@ -0,0 +1,129 @@
+"""Derived ratio metrics declared over Item codes.
+
+Each ratio in ``config.DERIVED_METRICS`` is a numerator and a denominator,
+both an Item code optionally restricted to values of other columns. Every
+component of every ratio is summed in one grouped pass per institution and
+period; ``rollups`` then sums numerators and denominators up the hierarchy
+before dividing, so coarser levels are weighted ratios rather than averages
+of ratios.
+"""
+import numpy as np
+import pandas as pd
+
+from . import config
+from .cache import versioned_cache
+
+COMPONENT_COLUMNS = ['LEI_Code', 'NSA', 'Period', 'Item', 'Label', 'Numerator', 'Denominator']
+
+
+def _component_key(component):
+    """Hashable (item, filters) key for a numerator or denominator."""
+    filters = tuple(sorted((col, value) for col, value in component.items() if col != 'Item'))
+    return component['Item'], filters
+
+
+def get_derived_labels():
+    """Get the labels of all declared derived metrics."""
+    return list(config.DERIVED_METRICS)
+
+
+def get_item_code(label):
+    """Get the synthetic Item code of a derived metric."""
+    return config.DERIVED_ITEM_BASE + get_derived_labels().index(label)
+
+
+def get_item_labels():
+    """Map the synthetic Item code of every derived metric to its label."""
+    return {get_item_code(label): label for label in get_derived_labels()}
+
+
+def is_derived(item):
+    """Check whether an Item code is a derived ratio."""
+    return config.DERIVED_ITEM_BASE <= item < config.DERIVED_ITEM_BASE + len(config.DERIVED_METRICS)
+
+
+def _is_available(df, definition):
+    """Check that a dataset has the columns and items a ratio needs."""
+    items = set(df['Item'].unique())
+    for component in (definition['numerator'], definition['denominator']):
+        if any(col not in df.columns for col in component) or component['Item'] not in items:
+            return False
+    return True
+
+
+@versioned_cache(maxsize=4)
+def get_available_labels(df):
+    """Get the derived metrics that can be computed for a dataset."""
+    if df is None or 'Item' not in df.columns:
+        return []
+    return [label for label, definition in config.DERIVED_METRICS.items() if _is_available(df, definition)]
+
+
+def get_available_items(df):
+    """Get the Item codes of the derived metrics that can be computed for a dataset."""
+    return [get_item_code(label) for label in get_available_labels(df)]
+
+
+def compute_components(df):
+    """Sum numerator and denominator of every derived metric per institution and period.
+
+    Returns a DataFrame with columns LEI_Code, NSA, Period, Item, Label,
+    Numerator, Denominator; institutions missing either component are left out.
+    """
+    labels = get_available_labels(df)
+    if not labels:
+        return pd.DataFrame(columns=COMPONENT_COLUMNS)
+
+    definitions = {label: config.DERIVED_METRICS[label] for label in labels}
+    components = sorted({
+        _component_key(definition[part])
+        for definition in definitions.values() for part in ('numerator', 'denominator')
+    })
+    component_ids = {key: i for i, key in enumerate(components)}
+
+    # The single pass over the full dataset; components are then tagged on the few matching rows
+    filter_columns = sorted({col for _, filters in components for col, _ in filters})
+    rows = df.loc[df['Item'].isin({item for item, _ in components}),
+                  ['LEI_Code', 'NSA', 'Period', 'Item', 'Amount', *filter_columns]]
+    tagged = []
+    for (item, filters), component_id in component_ids.items():
+        mask = rows['Item'].to_numpy() == item
+        for col, value in filters:
+            mask &= rows[col].to_numpy() == value
+        tagged.append(rows.loc[mask, ['LEI_Code', 'NSA', 'Period', 'Amount']].assign(Component=component_id))
+
+    sums = (
+        pd.concat(tagged)
+        .astype({'Amount': 'float64'})
+        .groupby(['LEI_Code', 'NSA', 'Period', 'Component'], observed=True)['Amount']
+        .sum()
+        .unstack('Component')
+    )
+
+    results = []
+    for label, definition in definitions.items():
+        numerator = component_ids[_component_key(definition['numerator'])]
+        denominator = component_ids[_component_key(definition['denominator'])]
+        if numerator not in sums.columns or denominator not in sums.columns:
+            continue
+        values = sums[[numerator, denominator]].set_axis(['Numerator', 'Denominator'], axis=1).dropna()
+        results.append(values.reset_index().assign(Item=get_item_code(label), Label=label))
+
+    if not results:
+        return pd.DataFrame(columns=COMPONENT_COLUMNS)
+    components_df = pd.concat(results, ignore_index=True)
+    return components_df.astype({'LEI_Code': str, 'NSA': str})[COMPONENT_COLUMNS]
+
+
+@versioned_cache(maxsize=4)
+def get_components(df):
+    """Get derived metric components for a dataset, cached per dataset version."""
+    return compute_components(df)
+
+
+def ratio(numerator, denominator):
+    """Divide as a percentage; a zero denominator gives NaN."""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator * 100, np.nan)
@@ -0,0 +1,66 @@
+"""Sorted multi-column index for slicing by Portfolio and Country.
+
+Amounts are summed once per (Period, Item, NSA, Portfolio, Country,
+LEI_Code) and kept under a lexsorted MultiIndex, so a selection is a set of
+binary searches on the index levels instead of a boolean mask over every
+row. The index is cached per dataset version.
+"""
+import pandas as pd
+
+from .cache import versioned_cache
+
+INDEX_LEVELS = ['Period', 'Item', 'NSA', 'Portfolio', 'Country', 'LEI_Code']
+
+DIMENSION_COLUMNS = ['Portfolio', 'Country']
+
+
+def has_dimensions(df):
+    """Check whether a dataset carries the Portfolio and Country breakdowns."""
+    return df is not None and all(col in df.columns for col in DIMENSION_COLUMNS)
+
+
+def build_dimension_index(df):
+    """Sum amounts per index key and sort the result by the index."""
+    indexed = (
+        df.groupby(INDEX_LEVELS, observed=True)
+        .agg(Label=('Label', 'first'), Amount=('Amount', 'sum'))
+    )
+    indexed['Label'] = indexed['Label'].astype(str)
+    indexed.index = indexed.index.set_levels(
+        [indexed.index.levels[i].astype(str) for i in (2, 5)], level=[2, 5]
+    )
+    return indexed.sort_index()
+
+
+@versioned_cache(maxsize=4)
+def get_dimension_index(df):
+    """Get the dimension index for a dataset, cached per dataset version."""
+    return build_dimension_index(df)
+
+
+def select(df, period, items, banks=None, portfolios=None, countries=None):
+    """Select rows by period, Item codes, banks, portfolios and countries.
+
+    ``None`` (or an empty list) for banks, portfolios or countries means all
+    of them, and a period of ``None`` selects every period. Values missing
+    from the dataset are ignored. Returns a flat DataFrame with the index
+    levels, Label and Amount.
+    """
+    indexed = get_dimension_index(df)
+    key = []
+    for level, values in enumerate((items, banks, portfolios, countries), start=1):
+        if not values:
+            key.append(slice(None))
+            continue
+        # get_locs raises on any value missing from its level, so keep the present ones
+        present = indexed.index.levels[level].intersection(list(values))
+        if present.empty:
+            return indexed.iloc[:0].reset_index()
+        key.append(list(present))
+
+    try:
+        period_key = slice(None) if period is None else pd.Timestamp(period)
+        locs = indexed.index.get_locs((period_key, *key, slice(None)))
+    except KeyError:
+        locs = []
+    return indexed.iloc[locs].reset_index()
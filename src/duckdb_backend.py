@@ -0,0 +1,185 @@
+"""DuckDB implementation of the data_processor query functions.
+
+Selected with ``config.QUERY_BACKEND = "duckdb"``. Aggregations run as SQL
+through embedded DuckDB, multi-threaded, directly against the dataset's
+Parquet file when given a frame from the registry, or against the frame
+itself otherwise. Results have the same shape as the pandas versions.
+
+Run ``python benchmark.py`` to check parity with the pandas implementation
+and benchmark both on synthetic data.
+"""
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from . import config
+from .dataset_registry import registry
+from .fingerprint import stat_signature
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency: pip install "p3dh[duckdb]"
+    duckdb = None
+
+_local = threading.local()
+
+# Parquet path -> (file signature, SQL expression for Period as a timestamp)
+_period_expressions = {}
+
+
+def is_available():
+    """Check whether the duckdb package is installed."""
+    return duckdb is not None
+
+
+def _connection():
+    """Get this thread's DuckDB connection."""
+    con = getattr(_local, 'con', None)
+    if con is None:
+        con = duckdb.connect()
+        if config.DUCKDB_THREADS:
+            con.execute(f"SET threads = {int(config.DUCKDB_THREADS)}")
+        _local.con = con
+    return con
+
+
+def _period_expression(con, path):
+    """Get the SQL expression that reads Period from a Parquet file as a timestamp.
+
+    The Period type is looked up again whenever the file changes, since a
+    reconverted file may store Period as a timestamp instead of yyyymm.
+    """
+    signature = stat_signature(path)
+    cached = _period_expressions.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    period_type = con.execute(
+        f"DESCRIBE SELECT Period FROM read_parquet('{path}')"
+    ).fetchone()[1]
+    if period_type in ('INTEGER', 'BIGINT', 'SMALLINT'):
+        expression = "make_timestamp(Period // 100, Period % 100, 1, 0, 0, 0)"
+    else:
+        expression = "CAST(Period AS TIMESTAMP)"
+    _period_expressions[path] = (signature, expression)
+    return expression
+
+
+def _relation(source):
+    """Get (connection, FROM clause) for a DataFrame or a Parquet path.
+
+    Frames handed out by the registry are read from their Parquet file so
+    DuckDB can prune columns and scan in parallel; any other frame is
+    scanned in place.
+    """
+    con = _connection()
+
+    if isinstance(source, pd.DataFrame):
+        spec = registry.spec_of(source)
+        if spec is not None and spec.source_path.suffix == '.parquet':
+            source = spec.source_path
+        else:
+            con.register('source_df', source)
+            return con, 'source_df'
+
+    path = str(Path(source))
+    period = _period_expression(con, path)
+    return con, (
+        f"(SELECT NSA::VARCHAR AS NSA, Item::BIGINT AS Item, {period} AS Period, Amount "
+        f"FROM read_parquet('{path}'))"
+    )
+
+
+def _query(source, sql, params):
+    """Run a query with ``{src}`` replaced by the source relation."""
+    con, relation = _relation(source)
+    return con.execute(sql.format(src=relation), params).df()
+
+
+def _timestamps(values):
+    """Convert periods to timestamps for query parameters."""
+    return [pd.Timestamp(v).to_pydatetime() for v in values]
+
+
+def prepare_comparison_data(source, banks, item, periods=None):
+    """Prepare data for bank comparison on a single metric (Item code)."""
+    sql = """
+        SELECT Period, NSA::VARCHAR AS NSA, SUM(Amount) AS Amount
+        FROM {src}
+        WHERE list_contains(?, NSA::VARCHAR) AND Item::BIGINT = ?
+    """
+    params = [list(banks), int(item)]
+    if periods:
+        sql += " AND list_contains(?, Period::TIMESTAMP)"
+        params.append(_timestamps(periods))
+    sql += " GROUP BY Period, NSA::VARCHAR"
+
+    grouped = _query(source, sql, params)
+    return grouped.pivot(index='Period', columns='NSA', values='Amount').sort_index()
+
+
+def prepare_metric_comparison_data(source, bank, items, period=None):
+    """Prepare data for metric (Item code) comparison for a single bank."""
+    sql = """
+        SELECT Item::BIGINT AS Item, SUM(Amount) AS Amount
+        FROM {src}
+        WHERE NSA::VARCHAR = ? AND list_contains(?, Item::BIGINT)
+    """
+    params = [bank, [int(i) for i in items]]
+    if period:
+        sql += " AND Period = ?"
+        params.append(_timestamps([period])[0])
+    sql += " GROUP BY Item::BIGINT ORDER BY Amount DESC"
+
+    return _query(source, sql, params)
+
+
+def calculate_period_change(source, banks, item):
+    """Calculate period-over-period changes for selected banks and metric (Item code)."""
+    pivot_df = prepare_comparison_data(source, banks, item)
+    return pivot_df.pct_change() * 100
+
+
+def get_top_banks(source, item, period, n=10):
+    """Get top N banks for a specific metric (Item code) and period."""
+    sql = """
+        SELECT NSA::VARCHAR AS NSA, SUM(Amount) AS Amount
+        FROM {src}
+        WHERE Item::BIGINT = ? AND Period = ?
+        GROUP BY NSA::VARCHAR
+        ORDER BY Amount DESC
+        LIMIT ?
+    """
+    top = _query(source, sql, [int(item), _timestamps([period])[0], int(n)])
+    return top['NSA'].tolist()
+
+
+def calculate_statistics(source, banks, item, period):
+    """Calculate statistical summary for selected banks and metric (Item code)."""
+    sql = """
+        SELECT AVG(Amount) AS mean, MEDIAN(Amount) AS median, STDDEV_SAMP(Amount) AS std,
+               MIN(Amount) AS min, MAX(Amount) AS max, SUM(Amount) AS total, COUNT(*) AS count
+        FROM (
+            SELECT NSA::VARCHAR AS NSA, SUM(Amount) AS Amount
+            FROM {src}
+            WHERE list_contains(?, NSA::VARCHAR) AND Item::BIGINT = ? AND Period = ?
+            GROUP BY NSA::VARCHAR
+        )
+    """
+    stats = _query(source, sql, [list(banks), int(item), _timestamps([period])[0]]).iloc[0].to_dict()
+    stats['total'] = stats['total'] if pd.notna(stats['total']) else 0.0
+    stats['count'] = int(stats['count'])
+    return stats
+
+
+def prepare_heatmap_data(source, banks, items, period):
+    """Prepare data for heatmap visualization (metrics as Item codes x banks)."""
+    sql = """
+        SELECT Item::BIGINT AS Item, NSA::VARCHAR AS NSA, SUM(Amount) AS Amount
+        FROM {src}
+        WHERE list_contains(?, NSA::VARCHAR) AND list_contains(?, Item::BIGINT) AND Period = ?
+        GROUP BY Item::BIGINT, NSA::VARCHAR
+    """
+    grouped = _query(source, sql, [list(banks), [int(i) for i in items], _timestamps([period])[0]])
+    return grouped.pivot(index='Item', columns='NSA', values='Amount').fillna(0).sort_index()
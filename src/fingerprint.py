@@ -0,0 +1,49 @@
+"""File fingerprinting used to detect when source files change."""
+import hashlib
+import threading
+from pathlib import Path
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Content hashes keyed by (path, size, mtime) so unchanged files are only stat'ed
+_hash_memo = {}
+_memo_lock = threading.Lock()
+
+
+def stat_signature(path):
+    """Get a cheap (size, mtime_ns) signature for a file, or None if it is missing."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def content_hash(path):
+    """Compute the SHA-256 of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """Get a fingerprint that changes whenever the file content changes.
+
+    The content hash is only recomputed when the file's size or mtime moves,
+    so repeated calls on an unchanged file cost a single stat.
+    """
+    signature = stat_signature(path)
+    if signature is None:
+        return None
+
+    key = (str(Path(path).resolve()), *signature)
+    with _memo_lock:
+        cached = _hash_memo.get(key)
+    if cached is None:
+        cached = content_hash(path)
+        with _memo_lock:
+            _hash_memo[key] = cached
+
+    return f"{signature[0]:x}-{cached[:16]}"
@@ -0,0 +1,252 @@
+"""Lookups for item, portfolio, country and institution metadata.
+
+TR_Metadata.xlsx is slow to parse, so it is converted once into Parquet
+sidecars under ``config.METADATA_CACHE_DIR`` and only rebuilt when the
+fingerprint of its sources changes. Sources are re-checked at most every
+``config.DATA_WATCH_INTERVAL`` seconds, so lookups do not stat the files.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from . import config
+from .fingerprint import file_fingerprint
+
+MANIFEST_NAME = "manifest.json"
+
+# Fingerprints of the sidecars last confirmed fresh, to skip re-reading the manifest
+_fresh_fingerprints = None
+_fresh_checked_at = None  # time.monotonic() of the last freshness check
+
+# Serializes freshness checks and conversion, so concurrent sessions convert once
+_cache_lock = threading.Lock()
+
+# Sidecar name -> index column of the stored table
+SIDECARS = {
+    'items': 'Item',
+    'portfolios': 'Portfolio',
+    'countries': 'Country',
+    'institutions': 'LEI_Code',
+    'sheets': 'Sheet',
+}
+
+
+def _data_source_path():
+    """Get the dataset file that item definitions are read from."""
+    data_path = Path(config.DATA_PATH)
+    parquet_path = data_path.with_suffix('.parquet')
+    return parquet_path if parquet_path.exists() else data_path
+
+
+def _source_fingerprints():
+    """Fingerprint the workbook and the dataset the sidecars are built from."""
+    return {
+        'workbook': file_fingerprint(config.METADATA_PATH),
+        'data': file_fingerprint(_data_source_path()),
+    }
+
+
+def _read_items(data_path):
+    """Read the Item -> Label/Sheet definitions from the dataset."""
+    columns = ['Item', 'Label', 'Sheet']
+    if data_path.suffix == '.parquet':
+        df = pd.read_parquet(data_path, columns=columns)
+    else:
+        df = pd.read_csv(data_path, usecols=columns)
+
+    items = (
+        df.astype({'Label': str, 'Sheet': str})
+        .groupby('Item', observed=True)
+        .agg(Label=('Label', 'first'), Sheets=('Sheet', lambda s: ', '.join(sorted(s.unique()))))
+    )
+    return items.sort_index()
+
+
+def _read_code_list(workbook, sheet_name, code_column):
+    """Read a code -> label sheet from the workbook."""
+    df = pd.read_excel(workbook, sheet_name=sheet_name)
+    df = df.rename(columns={df.columns[0]: code_column})
+    df = df.dropna(subset=[code_column])
+    df[code_column] = df[code_column].astype('int64')
+    return df.drop_duplicates(code_column).set_index(code_column).sort_index()
+
+
+def _read_institutions(workbook):
+    """Read the list of institutions, keyed by LEI code."""
+    df = pd.read_excel(workbook, sheet_name='List of Institutions', header=1,
+                       usecols=['Country', 'Desc_country', 'LEI_Code', 'Name', 'Finrep', 'Fin_year_end'])
+    df = df.dropna(subset=['LEI_Code'])
+    df = df.rename(columns={'Country': 'NSA'})
+    return df.drop_duplicates('LEI_Code').set_index('LEI_Code').sort_index()
+
+
+def _read_sheets(workbook):
+    """Read the dimensions used by each template sheet."""
+    raw = pd.read_excel(workbook, sheet_name='Dimensions used', header=None)
+    rows = []
+    group = None
+    for values in raw.iloc[1:].itertuples(index=False):
+        if pd.notna(values[0]):
+            group = values[0]
+        dimensions = [v for v in values[7:14] if pd.notna(v)]
+        rows.append({'Sheet': str(values[1]).strip(), 'Group': group,
+                     'Dimensions': ', '.join(dimensions)})
+    return pd.DataFrame(rows).drop_duplicates('Sheet').set_index('Sheet').sort_index()
+
+
+def convert_metadata(cache_dir=None):
+    """Convert TR_Metadata.xlsx (and dataset item definitions) into Parquet sidecars."""
+    workbook = Path(config.METADATA_PATH)
+    cache_dir = Path(cache_dir or config.METADATA_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    fingerprints = _source_fingerprints()
+
+    with pd.ExcelFile(workbook) as xlsx:
+        tables = {
+            'portfolios': _read_code_list(xlsx, 'Portfolio', 'Portfolio'),
+            'countries': _read_code_list(xlsx, 'Country', 'Country'),
+            'institutions': _read_institutions(xlsx),
+            'sheets': _read_sheets(xlsx),
+        }
+    tables['items'] = _read_items(_data_source_path())
+
+    # Each file is written aside and moved into place, so readers never see a partial file
+    for name, table in tables.items():
+        path = cache_dir / f"{name}.parquet"
+        tmp_path = path.with_suffix('.parquet.tmp')
+        table.to_parquet(tmp_path, engine='pyarrow')
+        os.replace(tmp_path, path)
+
+    # Manifest is written last so a partial conversion is never treated as fresh
+    manifest_path = cache_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix('.json.tmp')
+    tmp_path.write_text(json.dumps(fingerprints, indent=2))
+    os.replace(tmp_path, manifest_path)
+
+    return fingerprints
+
+
+def ensure_metadata_cache(force=False):
+    """Build the sidecars if missing or stale and return their fingerprint key.
+
+    Returns None when the workbook is not available. A recent successful
+    check is reused without touching the files.
+    """
+    global _fresh_fingerprints, _fresh_checked_at
+
+    if not force and _is_recently_checked():
+        return _fingerprint_key(_fresh_fingerprints)
+
+    with _cache_lock:
+        # Another session may have checked (or converted) while we waited
+        if not force and _is_recently_checked():
+            return _fingerprint_key(_fresh_fingerprints)
+
+        if not Path(config.METADATA_PATH).exists():
+            return None
+
+        cache_dir = Path(config.METADATA_CACHE_DIR)
+        manifest_path = cache_dir / MANIFEST_NAME
+        fingerprints = _source_fingerprints()
+
+        stale = force or fingerprints != _fresh_fingerprints
+        if stale and not force and manifest_path.exists():
+            stale = json.loads(manifest_path.read_text()) != fingerprints
+        if not stale:
+            stale = any(not (cache_dir / f"{name}.parquet").exists() for name in SIDECARS)
+
+        if stale:
+            fingerprints = convert_metadata(cache_dir)
+
+        _fresh_fingerprints = fingerprints
+        _fresh_checked_at = time.monotonic()
+        return _fingerprint_key(fingerprints)
+
+
+def _is_recently_checked():
+    """Check whether the sidecars were confirmed fresh within the watch interval.
+
+    With the interval at 0 (hot reload disabled) the first check holds.
+    """
+    if _fresh_checked_at is None:
+        return False
+    interval = config.DATA_WATCH_INTERVAL
+    return not interval or time.monotonic() - _fresh_checked_at < interval
+
+
+def _fingerprint_key(fingerprints):
+    """Flatten source fingerprints into a single cache key."""
+    return "|".join(f"{k}={v}" for k, v in sorted(fingerprints.items()))
+
+
+@st.cache_resource(show_spinner=False)
+def _load_sidecars(fingerprint):
+    """Load all sidecars for a given fingerprint; shared read-only across sessions."""
+    cache_dir = Path(config.METADATA_CACHE_DIR)
+    return {name: pd.read_parquet(cache_dir / f"{name}.parquet") for name in SIDECARS}
+
+
+def get_metadata_table(name):
+    """Get an indexed metadata table ('items', 'portfolios', 'countries', 'institutions', 'sheets')."""
+    try:
+        fingerprint = ensure_metadata_cache()
+    except Exception as e:
+        st.warning(f"Could not load metadata: {str(e)}")
+        fingerprint = None
+
+    if fingerprint is None:
+        return pd.DataFrame(index=pd.Index([], name=SIDECARS[name]))
+    return _load_sidecars(fingerprint)[name]
+
+
+def _lookup(name, key, column, default=None):
+    """Look up a single value in an indexed metadata table."""
+    table = get_metadata_table(name)
+    if column not in table.columns or key not in table.index:
+        return default
+    return table.at[key, column]
+
+
+def get_item_info(item):
+    """Get the definition (Label, Sheets) for an Item code."""
+    table = get_metadata_table('items')
+    if item not in table.index:
+        return {}
+    return table.loc[item].to_dict()
+
+
+def get_item_label(item):
+    """Get the label for an Item code."""
+    return _lookup('items', item, 'Label', default=str(item))
+
+
+def get_portfolio_label(portfolio):
+    """Get the description for a Portfolio code."""
+    return _lookup('portfolios', portfolio, 'Label', default=str(portfolio))
+
+
+def get_country_label(country):
+    """Get the description for a Country code."""
+    return _lookup('countries', country, 'Label', default=str(country))
+
+
+def get_country_iso(country):
+    """Get the ISO code for a Country code."""
+    return _lookup('countries', country, 'ISO_code')
+
+
+def get_institution_name(lei_code):
+    """Get the institution name for an LEI code."""
+    return _lookup('institutions', lei_code, 'Name', default=lei_code)
+
+
+def get_sheet_dimensions(sheet):
+    """Get the breakdown dimensions used by a template sheet."""
+    dimensions = _lookup('sheets', sheet, 'Dimensions', default='')
+    return [d for d in dimensions.split(', ') if d]
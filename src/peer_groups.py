@@ -0,0 +1,199 @@
+"""User-defined peer groups and their benchmark statistics.
+
+A peer group is a saved set of banks (NSA codes) or institutions (LEI
+codes), persisted as JSON at ``config.PEER_GROUPS_PATH``. Regions from
+``config.BANK_REGIONS`` are offered as built-in groups. Group total, mean
+and median per metric and period are computed for every group at once:
+the members of all groups form one membership mapping, which is joined to
+the level's rollup and aggregated in a single groupby. With Portfolio or
+Country filters the rollup is built from the matching rows only, like the
+chart bars. Derived ratios take the ratio of the group's summed components
+as their total.
+"""
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from . import config, derived_metrics, rollups
+from .cache import versioned_cache
+
+KINDS = {'nsa': 'Banks (NSA)', 'lei': 'Institutions (LEI)'}
+
+STATS = {'Mean': 'Group mean', 'Median': 'Group median', 'Total': 'Group total'}
+
+STAT_COLUMNS = ['Group', 'Period', 'Item', 'Total', 'Mean', 'Median', 'Members']
+
+# Levels at which group members are comparable to the chart bars
+BENCHMARK_LEVELS = ('institution', 'country')
+
+
+def _builtin_groups():
+    """Regions as read-only NSA peer groups."""
+    return {region: {'kind': 'nsa', 'members': list(banks)} for region, banks in config.BANK_REGIONS.items()}
+
+
+def _read_saved_groups():
+    """Read saved peer groups; a missing or unreadable file means none."""
+    path = Path(config.PEER_GROUPS_PATH)
+    if not path.exists():
+        return {}
+    try:
+        groups = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return {
+        name: {'kind': group['kind'], 'members': list(group['members'])}
+        for name, group in groups.items()
+        if isinstance(group, dict) and group.get('kind') in KINDS and group.get('members')
+    }
+
+
+def _write_saved_groups(groups):
+    """Write saved peer groups in one step, so readers never see a partial file."""
+    path = Path(config.PEER_GROUPS_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    tmp_path.write_text(json.dumps(groups, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def get_peer_groups():
+    """Get all peer groups by name: built-in regions, then saved groups."""
+    return {**_builtin_groups(), **_read_saved_groups()}
+
+
+def is_builtin(name):
+    """Check whether a peer group is a built-in region."""
+    return name in config.BANK_REGIONS
+
+
+def save_peer_group(name, kind, members):
+    """Save (or replace) a peer group of NSA or LEI codes."""
+    name = name.strip()
+    if not name:
+        raise ValueError("Peer group needs a name")
+    if is_builtin(name):
+        raise ValueError(f"'{name}' is a built-in region")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown peer group kind: {kind}")
+    if not members:
+        raise ValueError("Peer group needs at least one member")
+
+    groups = _read_saved_groups()
+    groups[name] = {'kind': kind, 'members': sorted(set(members))}
+    _write_saved_groups(groups)
+
+
+def delete_peer_group(name):
+    """Delete a saved peer group."""
+    groups = _read_saved_groups()
+    if groups.pop(name, None) is not None:
+        _write_saved_groups(groups)
+
+
+def get_groups_containing(bank, groups=None):
+    """Get the names of saved peer groups with a bank (NSA code) as member."""
+    groups = _read_saved_groups() if groups is None else groups
+    return [name for name, group in groups.items() if group['kind'] == 'nsa' and bank in group['members']]
+
+
+def build_membership(df, groups, level):
+    """Map every group to its member entities at a level.
+
+    At institution level NSA groups expand to the institutions of their
+    banks; at country level only NSA groups apply. Returns a DataFrame with
+    columns Group and Entity.
+    """
+    pairs = pd.DataFrame(
+        [(name, group['kind'], member) for name, group in groups.items() for member in group['members']],
+        columns=['Group', 'Kind', 'Member']
+    )
+    direct_kind = 'lei' if level == 'institution' else 'nsa'
+    members = pairs.loc[pairs['Kind'] == direct_kind, ['Group', 'Member']].rename(columns={'Member': 'Entity'})
+
+    if level == 'institution':
+        institutions = rollups.get_rollups(df)['institution'][['Entity', 'Parent']].drop_duplicates()
+        expanded = pairs[pairs['Kind'] == 'nsa'].merge(institutions, left_on='Member', right_on='Parent')
+        members = pd.concat([members, expanded[['Group', 'Entity']]], ignore_index=True)
+
+    return members.drop_duplicates()
+
+
+def compute_group_stats(df, groups, level, portfolios=None, countries=None):
+    """Compute total, mean, median and member count per group, metric and period.
+
+    Raw metrics are limited to the selected portfolios and countries; derived
+    ratios carry their own filters. Returns a DataFrame with columns Group,
+    Period, Item, Total, Mean, Median, Members; empty at levels without
+    benchmarks.
+    """
+    if not groups or level not in BENCHMARK_LEVELS:
+        return pd.DataFrame(columns=STAT_COLUMNS)
+
+    members = build_membership(df, groups, level)
+    if members.empty:
+        return pd.DataFrame(columns=STAT_COLUMNS)
+
+    if portfolios or countries:
+        raw = rollups.get_dimension_rollup(df, level, portfolios, countries)
+    else:
+        raw = rollups.get_rollups(df)[level]
+    values = pd.concat([raw, rollups.get_ratio_rollups(df)[level]], ignore_index=True)
+
+    # The single grouped pass for all groups, metrics and periods
+    stats = (
+        values.merge(members, on='Entity')
+        .groupby(['Group', 'Period', 'Item'], observed=True)['Amount']
+        .agg(Total='sum', Mean='mean', Median='median', Members='count')
+    )
+
+    # A group's ratio is its summed numerator over its summed denominator
+    components = derived_metrics.get_components(df)
+    if not components.empty:
+        key = 'LEI_Code' if level == 'institution' else 'NSA'
+        summed = (
+            components.merge(members.rename(columns={'Entity': key}), on=key)
+            .groupby(['Group', 'Period', 'Item'], observed=True)[['Numerator', 'Denominator']]
+            .sum()
+        )
+        totals = pd.Series(derived_metrics.ratio(summed['Numerator'], summed['Denominator']), index=summed.index)
+        is_ratio = stats.index.get_level_values('Item').map(derived_metrics.is_derived).to_numpy(dtype=bool)
+        stats.loc[is_ratio, 'Total'] = totals.reindex(stats.index[is_ratio]).to_numpy()
+
+    return stats.reset_index()[STAT_COLUMNS]
+
+
+@versioned_cache(maxsize=8)
+def get_group_stats(df, groups, level, portfolios=None, countries=None):
+    """Get peer group statistics, cached per dataset version, groups, level and filters."""
+    return compute_group_stats(df, groups, level, portfolios, countries)
+
+
+def get_benchmarks(df, groups, level, item, period, stat='Mean', portfolios=None, countries=None):
+    """Get (group name, value) benchmark pairs for one metric (Item code) and period."""
+    stats = get_group_stats(df, groups, level, portfolios, countries)
+    if stats.empty:
+        return ()
+    rows = stats[(stats['Item'] == item) & (stats['Period'] == period)].dropna(subset=[stat])
+    order = {name: i for i, name in enumerate(groups)}
+    rows = rows.sort_values('Group', key=lambda names: names.map(order))
+    return tuple(zip(rows['Group'], rows[stat].astype(float), strict=True))
+
+
+def get_benchmarks_by_period(df, groups, level, item, stat='Mean', portfolios=None, countries=None):
+    """Get benchmark pairs for one metric (Item code) in every period.
+
+    Returns ((period, ((group name, value), ...)), ...) in period order.
+    """
+    stats = get_group_stats(df, groups, level, portfolios, countries)
+    if stats.empty:
+        return ()
+    rows = stats[stats['Item'] == item].dropna(subset=[stat])
+    order = {name: i for i, name in enumerate(groups)}
+    rows = rows.sort_values(['Period', 'Group'], key=lambda col: col.map(order) if col.name == 'Group' else col)
+    return tuple(
+        (period, tuple(zip(period_rows['Group'], period_rows[stat].astype(float), strict=True)))
+        for period, period_rows in rows.groupby('Period', sort=True)
+    )
@@ -0,0 +1,44 @@
+"""Peer percentile ranks and z-scores for every bank across all metrics.
+
+Ranks are computed for every (Label, Period) group at once from the
+country-level rollup, so a bank's full peer profile is a lookup instead of
+one pivot per metric. Results are cached per dataset version.
+"""
+from . import rollups
+from .cache import versioned_cache
+
+RANK_COLUMNS = ['NSA', 'Period', 'Item', 'Label', 'Amount', 'Rank', 'Peers', 'Percentile', 'Z_Score']
+
+
+def compute_peer_ranks(df):
+    """Rank every NSA within each (Label, Period) group.
+
+    Returns one row per (NSA, Period, Label) with the amount, the descending
+    rank, the number of peers, the percentile rank (0-100, higher amount =
+    higher percentile) and the z-score against the group.
+    """
+    ranks = rollups.get_rollups(df)['country'].rename(columns={'Entity': 'NSA'})
+    ranks = ranks[['NSA', 'Period', 'Item', 'Label', 'Amount']].copy()
+
+    grouped = ranks.groupby(['Label', 'Period'], sort=False)['Amount']
+    ranks['Rank'] = grouped.rank(ascending=False, method='min').astype('int32')
+    ranks['Peers'] = grouped.transform('size').astype('int32')
+    ranks['Percentile'] = grouped.rank(pct=True) * 100
+
+    std = grouped.transform('std')
+    ranks['Z_Score'] = (ranks['Amount'] - grouped.transform('mean')) / std.where(std > 0)
+
+    return ranks[RANK_COLUMNS].reset_index(drop=True)
+
+
+@versioned_cache(maxsize=4)
+def get_peer_ranks(df):
+    """Get peer ranks for a dataset, cached per dataset version."""
+    return compute_peer_ranks(df)
+
+
+def get_bank_profile(df, bank, period):
+    """Get a bank's peer ranking across all metrics for one period, best percentile first."""
+    ranks = get_peer_ranks(df)
+    profile = ranks[(ranks['NSA'] == bank) & (ranks['Period'] == period)]
+    return profile.sort_values('Percentile', ascending=False).reset_index(drop=True)
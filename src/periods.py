@@ -0,0 +1,18 @@
+"""Period columns shared by loading, conversion, scans and diffs."""
+import pandas as pd
+
+
+def period_columns(period):
+    """Build the Period (datetime) and Period_Label (categorical) columns.
+
+    Accepts YYYYMM integers or strings, or datetimes. Only the distinct
+    periods are parsed and formatted; rows are filled in by their codes.
+    """
+    codes, uniques = pd.factorize(period, sort=True)
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        dates = pd.DatetimeIndex(uniques)
+    else:
+        dates = pd.to_datetime(pd.Index(uniques).astype(str), format='%Y%m')
+
+    labels = pd.Categorical.from_codes(codes, categories=dates.strftime('%b %Y'), ordered=True)
+    return pd.Series(dates.take(codes, allow_fill=True), index=period.index), pd.Series(labels, index=period.index)
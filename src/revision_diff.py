@@ -0,0 +1,252 @@
+"""Versioned dataset snapshots and the revision diff between two releases.
+
+``convert_data`` keeps a copy of every converted Parquet file under
+``config.SNAPSHOT_DIR``. Two versions are compared cell by cell: every key
+column is encoded against the union of both files' values, the codes are
+packed into one int64 key per row, and both sides are sorted on it. The
+sorted keys are then joined with a single intersection, so added, removed
+and revised amounts come out of a few vectorized passes over full releases.
+
+Usage: python -m src.revision_diff [dataset] [--old PATH] [--new PATH] [--output CSV]
+"""
+import argparse
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from . import config
+from .dataset_registry import registry
+from .fingerprint import content_hash, stat_signature
+from .periods import period_columns
+
+# Columns identifying a reported amount
+KEY_COLUMNS = ['LEI_Code', 'Item', 'Portfolio', 'Country', 'Period']
+
+# Breakdown columns some templates report within a key; they are part of the key when present
+DETAIL_COLUMNS = ['Exposure', 'Status', 'Perf_Status', 'NACE_codes']
+
+# Descriptive columns carried to the result, taken from the version that has the row
+INFO_COLUMNS = ['NSA', 'Label']
+
+REVISIONS = ('added', 'removed', 'revised')
+
+_INT64_LIMIT = np.iinfo(np.int64).max
+
+
+def snapshot_dir(dataset):
+    """Directory with the snapshots of a dataset."""
+    return Path(config.SNAPSHOT_DIR) / dataset
+
+
+def list_snapshots(dataset):
+    """List a dataset's snapshots, oldest first."""
+    directory = snapshot_dir(dataset)
+    if not directory.exists():
+        return []
+    return sorted(directory.glob('*.parquet'))
+
+
+def save_snapshot(dataset, path):
+    """Keep a copy of a converted file as a new version of a dataset.
+
+    Snapshots are named ``<UTC time>_<content hash>.parquet``; nothing is
+    saved when the latest snapshot has the same content. Returns the
+    snapshot path and whether it was newly written.
+    """
+    digest = content_hash(path)[:12]
+    snapshots = list_snapshots(dataset)
+    if snapshots and snapshots[-1].stem.endswith(f"_{digest}"):
+        return snapshots[-1], False
+
+    target = snapshot_dir(dataset) / f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}_{digest}.parquet"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix('.parquet.tmp')
+    shutil.copyfile(path, tmp_path)
+    tmp_path.replace(target)
+    return target, True
+
+
+def describe_snapshot(path):
+    """Readable name of a snapshot, e.g. '2025-07-01 09:30 UTC (3f2a9c1e0b7d)'."""
+    path = Path(path)
+    stamp, _, digest = path.stem.partition('_')
+    try:
+        created = time.strptime(stamp, '%Y%m%dT%H%M%S')
+    except ValueError:
+        return path.name
+    return f"{time.strftime('%Y-%m-%d %H:%M', created)} UTC ({digest})"
+
+
+def _file_columns(path):
+    """Column names of a Parquet or CSV dataset file."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pq.read_schema(path).names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def _read_columns(path, columns):
+    """Read some columns of a dataset file, with Period as datetime."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    if 'Period' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Period']):
+        df['Period'] = period_columns(df['Period'])[0]
+    return df
+
+
+def _column_codes(old, new):
+    """Encode a key column of both versions against the union of their values.
+
+    Returns the old codes, the new codes and the number of distinct codes;
+    missing values get code 0.
+    """
+    if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+        uniques = old.cat.categories.union(new.cat.categories)
+        codes = []
+        for col in (old, new):
+            # Category code -1 (missing) picks the trailing -1, which becomes 0
+            mapping = np.append(uniques.get_indexer(col.cat.categories), -1)
+            codes.append(mapping[col.cat.codes.to_numpy()].astype('int64') + 1)
+        return codes[0], codes[1], len(uniques) + 1
+
+    codes, uniques = pd.factorize(pd.concat([old, new], ignore_index=True))
+    codes = codes.astype('int64') + 1
+    return codes[:len(old)], codes[len(old):], len(uniques) + 1
+
+
+def _pack_keys(old, new, columns):
+    """Pack the key columns of both versions into one int64 key per row.
+
+    Keys are built column by column in mixed radix; when the next column
+    would overflow int64, the partial keys are renumbered densely first.
+    """
+    keys = np.zeros(len(old) + len(new), dtype='int64')
+    size = 1
+    for col in columns:
+        old_codes, new_codes, n = _column_codes(old[col], new[col])
+        if size > _INT64_LIMIT // n:
+            uniques, keys = np.unique(keys, return_inverse=True)
+            size = len(uniques)
+        keys = keys * n + np.concatenate([old_codes, new_codes])
+        size *= n
+    return keys[:len(old)], keys[len(old):]
+
+
+def _sorted_side(keys, amounts):
+    """Sort one version on its keys; rows sharing a key are summed.
+
+    Returns the distinct sorted keys, their amounts and a source row for each.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+    sorted_amounts = amounts[order]
+    if len(unique_keys) == len(sorted_keys):
+        return unique_keys, sorted_amounts, order
+    return unique_keys, np.add.reduceat(sorted_amounts, starts), order[starts]
+
+
+def diff_frames(old, new, tolerance=0.0):
+    """Compare two versions of a dataset cell by cell.
+
+    A cell is identified by ``KEY_COLUMNS`` plus the ``DETAIL_COLUMNS``
+    both versions have. Amounts differing by more than ``tolerance`` are
+    revised; a missing amount only equals another missing amount.
+
+    Returns the changed cells (key and info columns, Old_Amount,
+    New_Amount, Change, Revision) and counts per revision kind plus unchanged.
+    """
+    columns = [col for col in KEY_COLUMNS + DETAIL_COLUMNS if col in old.columns and col in new.columns]
+    old_keys, new_keys = _pack_keys(old, new, columns)
+    # Amounts are compared at the float32 precision they are stored in, so a CSV round trip is no revision
+    old_amounts = old['Amount'].to_numpy(dtype='float32').astype('float64')
+    new_amounts = new['Amount'].to_numpy(dtype='float32').astype('float64')
+    old_keys, old_amounts, old_rows = _sorted_side(old_keys, old_amounts)
+    new_keys, new_amounts, new_rows = _sorted_side(new_keys, new_amounts)
+
+    # The join: one intersection of the sorted keys
+    _, old_common, new_common = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+    removed = np.ones(len(old_keys), dtype=bool)
+    removed[old_common] = False
+    added = np.ones(len(new_keys), dtype=bool)
+    added[new_common] = False
+
+    old_values, new_values = old_amounts[old_common], new_amounts[new_common]
+    revised = ~np.isclose(old_values, new_values, rtol=0, atol=tolerance, equal_nan=True)
+
+    output_columns = columns + [col for col in INFO_COLUMNS if col in old.columns and col in new.columns]
+    parts = [
+        ('added', new, new_rows[added], np.full(added.sum(), np.nan), new_amounts[added]),
+        ('removed', old, old_rows[removed], old_amounts[removed], np.full(removed.sum(), np.nan)),
+        ('revised', new, new_rows[new_common[revised]], old_values[revised], new_values[revised]),
+    ]
+    changes = pd.concat([
+        frame.iloc[rows][output_columns].reset_index(drop=True)
+        .assign(Old_Amount=old_amounts_, New_Amount=new_amounts_, Revision=revision)
+        for revision, frame, rows, old_amounts_, new_amounts_ in parts
+    ], ignore_index=True)
+    changes['Change'] = changes['New_Amount'] - changes['Old_Amount']
+    changes = changes[output_columns + ['Old_Amount', 'New_Amount', 'Change', 'Revision']]
+
+    summary = {revision: int((changes['Revision'] == revision).sum()) for revision in REVISIONS}
+    summary['unchanged'] = len(old_common) - summary['revised']
+    return changes, summary
+
+
+def diff_files(old_path, new_path, tolerance=0.0):
+    """Compare two dataset files (Parquet or CSV); see ``diff_frames``."""
+    columns = KEY_COLUMNS + DETAIL_COLUMNS + INFO_COLUMNS + ['Amount']
+    old_columns, new_columns = set(_file_columns(old_path)), set(_file_columns(new_path))
+    shared = [col for col in columns if col in old_columns and col in new_columns]
+    return diff_frames(_read_columns(old_path, shared), _read_columns(new_path, shared), tolerance)
+
+
+@lru_cache(maxsize=4)
+def _cached_diff(old_path, old_signature, new_path, new_signature, tolerance):
+    """Diff two files; cached per file signatures."""
+    return diff_files(old_path, new_path, tolerance)
+
+
+def get_diff(old_path, new_path, tolerance=0.0):
+    """Get the diff of two dataset files, recomputed only when either file changes."""
+    return _cached_diff(str(old_path), stat_signature(old_path), str(new_path), stat_signature(new_path),
+                        float(tolerance))
+
+
+def main():
+    """Print the revisions between two versions of a dataset."""
+    parser = argparse.ArgumentParser(description="Diff two versions of a dataset.")
+    parser.add_argument('dataset', nargs='?', default=config.DEFAULT_DATASET)
+    parser.add_argument('--old', help="Old version (default: the second latest snapshot)")
+    parser.add_argument('--new', help="New version (default: the latest snapshot)")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Ignore amount changes up to this size")
+    parser.add_argument('--output', help="Write the changed cells to this CSV file")
+    args = parser.parse_args()
+
+    snapshots = list_snapshots(args.dataset)
+    old_path = args.old or (snapshots[-2] if len(snapshots) >= 2 else None)
+    new_path = args.new or (snapshots[-1] if snapshots else registry.spec(args.dataset).source_path)
+    if old_path is None:
+        parser.error(f"Fewer than two snapshots of '{args.dataset}' in {snapshot_dir(args.dataset)}; pass --old")
+
+    start = time.perf_counter()
+    changes, summary = diff_files(old_path, new_path, args.tolerance)
+    print(f"{old_path} → {new_path} in {time.perf_counter() - start:.2f}s")
+    for revision in (*REVISIONS, 'unchanged'):
+        print(f"  {revision.capitalize():<10} {summary[revision]:>12,}")
+
+    if args.output:
+        changes.to_csv(args.output, index=False)
+        print(f"\n✓ {len(changes):,} changed cells written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
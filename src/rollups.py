@@ -0,0 +1,197 @@
+"""Hierarchical rollups: institution (LEI) -> country (NSA) -> region -> EU total.
+
+The full dataset is aggregated once, at institution level; every coarser
+level is rolled up from that much smaller result. Rollups are cached per
+dataset version, so drilling down on the Compare page is a lookup rather
+than a new groupby over every row. Derived ratios are rolled up from their
+summed numerators and denominators in the same shape.
+"""
+import pandas as pd
+
+from . import bank_catalog, config, derived_metrics, dimension_index, metadata
+from .cache import versioned_cache
+
+LEVEL_LABELS = {
+    'institution': 'Institution (LEI)',
+    'country': 'Country (NSA)',
+    'region': 'Region',
+    'eu': 'EU Total',
+}
+
+EU_ENTITY = 'EU'
+
+ROLLUP_COLUMNS = ['Entity', 'Parent', 'Period', 'Item', 'Label', 'Amount']
+
+
+def _region_map(nsa_codes):
+    """Map each NSA code to its region."""
+    return {nsa: bank_catalog.get_region_for_bank(nsa) for nsa in nsa_codes}
+
+
+def compute_rollups(df):
+    """Compute amounts per level, period and metric.
+
+    Returns a dict of level -> DataFrame with columns
+    Entity, Parent, Period, Item, Label, Amount.
+    """
+    if df is None or df.empty:
+        return {level: pd.DataFrame(columns=ROLLUP_COLUMNS) for level in LEVEL_LABELS}
+
+    # The single pass over the full dataset
+    institution = (
+        df.groupby(['LEI_Code', 'NSA', 'Period', 'Item', 'Label'], observed=True)['Amount']
+        .sum()
+        .reset_index()
+    )
+    institution = institution.astype({'LEI_Code': str, 'NSA': str, 'Label': str})
+
+    keys = ['Period', 'Item', 'Label']
+
+    country = institution.groupby(['NSA', *keys])['Amount'].sum().reset_index()
+    country['Region'] = country['NSA'].map(_region_map(country['NSA'].unique()))
+
+    region = country.groupby(['Region', *keys])['Amount'].sum().reset_index()
+
+    eu = region.groupby(keys)['Amount'].sum().reset_index()
+    eu['Entity'] = EU_ENTITY
+    eu['Parent'] = None
+
+    return {
+        'institution': institution.rename(columns={'LEI_Code': 'Entity', 'NSA': 'Parent'})[ROLLUP_COLUMNS],
+        'country': country.rename(columns={'NSA': 'Entity', 'Region': 'Parent'})[ROLLUP_COLUMNS],
+        'region': region.rename(columns={'Region': 'Entity'}).assign(Parent=EU_ENTITY)[ROLLUP_COLUMNS],
+        'eu': eu[ROLLUP_COLUMNS],
+    }
+
+
+@versioned_cache(maxsize=4)
+def get_rollups(df):
+    """Get rollups for a dataset, cached per dataset version."""
+    return compute_rollups(df)
+
+
+def compute_ratio_rollups(df):
+    """Compute derived ratios per level, period and metric.
+
+    Numerators and denominators are summed at each level before dividing.
+    Returns the same shape as ``compute_rollups``, with Amount in percent.
+    """
+    institution = derived_metrics.get_components(df)
+    if institution.empty:
+        return {level: pd.DataFrame(columns=ROLLUP_COLUMNS) for level in LEVEL_LABELS}
+
+    keys = ['Period', 'Item', 'Label']
+    parts = ['Numerator', 'Denominator']
+
+    country = institution.groupby(['NSA', *keys])[parts].sum().reset_index()
+    country['Region'] = country['NSA'].map(_region_map(country['NSA'].unique()))
+
+    region = country.groupby(['Region', *keys])[parts].sum().reset_index()
+
+    eu = region.groupby(keys)[parts].sum().reset_index()
+    eu['Entity'] = EU_ENTITY
+    eu['Parent'] = None
+
+    levels = {
+        'institution': institution.rename(columns={'LEI_Code': 'Entity', 'NSA': 'Parent'}),
+        'country': country.rename(columns={'NSA': 'Entity', 'Region': 'Parent'}),
+        'region': region.rename(columns={'Region': 'Entity'}).assign(Parent=EU_ENTITY),
+        'eu': eu,
+    }
+    result = {}
+    for level, values in levels.items():
+        values = values.assign(Amount=derived_metrics.ratio(values['Numerator'], values['Denominator']))
+        result[level] = values.dropna(subset=['Amount'])[ROLLUP_COLUMNS].reset_index(drop=True)
+    return result
+
+
+@versioned_cache(maxsize=4)
+def get_ratio_rollups(df):
+    """Get derived ratio rollups for a dataset, cached per dataset version."""
+    return compute_ratio_rollups(df)
+
+
+def _rollup_slice(rows, level):
+    """Roll dimension-index rows up to one level."""
+    keys = ['Period', 'Item', 'Label']
+    if level == 'institution':
+        values = rows.groupby(['LEI_Code', 'NSA', *keys])['Amount'].sum().reset_index()
+        return values.rename(columns={'LEI_Code': 'Entity', 'NSA': 'Parent'})[ROLLUP_COLUMNS]
+
+    values = rows.groupby(['NSA', *keys])['Amount'].sum().reset_index()
+    values['Region'] = values['NSA'].map(_region_map(values['NSA'].unique()))
+    if level == 'country':
+        return values.rename(columns={'NSA': 'Entity', 'Region': 'Parent'})[ROLLUP_COLUMNS]
+
+    values = values.groupby(['Region', *keys])['Amount'].sum().reset_index()
+    if level == 'region':
+        return values.rename(columns={'Region': 'Entity'}).assign(Parent=EU_ENTITY)[ROLLUP_COLUMNS]
+
+    values = values.groupby(keys)['Amount'].sum().reset_index()
+    return values.assign(Entity=EU_ENTITY, Parent=None)[ROLLUP_COLUMNS]
+
+
+@versioned_cache(maxsize=4)
+def get_dimension_rollup(df, level, portfolios=None, countries=None):
+    """Get one level's rollup of every bank, metric and period, limited to portfolios and countries."""
+    return _rollup_slice(dimension_index.select(df, None, None, None, portfolios, countries), level)
+
+
+def _select_level(rollup, level, banks, items, period):
+    """Mask precomputed rollup rows to the selected Item codes, period (None: all) and banks."""
+    mask = rollup['Item'].isin(items)
+    if period is not None:
+        mask &= rollup['Period'] == period
+    if level == 'institution':
+        mask &= rollup['Parent'].isin(banks)
+    elif level == 'country':
+        mask &= rollup['Entity'].isin(banks)
+    elif level == 'region':
+        mask &= rollup['Entity'].isin({bank_catalog.get_region_for_bank(b) for b in banks})
+    return rollup[mask]
+
+
+def get_level_values(df, level, banks, items, period, portfolios=None, countries=None):
+    """Get rollup rows for a level and metrics (Item codes), scoped to the selected banks (NSA codes).
+
+    Institutions are limited to those of the selected banks and regions to
+    those containing a selected bank; the EU level is always the full total.
+    With Portfolio or Country filters the values are rolled up from a
+    dimension index lookup instead of the precomputed rollups. Derived
+    ratios carry their own dimension filters and ignore the selected ones.
+    A period of None selects every period at once.
+    """
+    ratios = [i for i in items if derived_metrics.is_derived(i)]
+    items = [i for i in items if not derived_metrics.is_derived(i)]
+
+    if not items:
+        values = pd.DataFrame(columns=ROLLUP_COLUMNS)
+    elif portfolios or countries:
+        scope = banks if level in ('institution', 'country') else None
+        rows = dimension_index.select(df, period, items, scope, portfolios, countries)
+        values = _rollup_slice(rows, level)
+        if level == 'region':
+            values = values[values['Entity'].isin({bank_catalog.get_region_for_bank(b) for b in banks})]
+    else:
+        values = _select_level(get_rollups(df)[level], level, banks, items, period)
+
+    if not ratios:
+        return values
+    ratio_values = _select_level(get_ratio_rollups(df)[level], level, banks, ratios, period)
+    return pd.concat([values, ratio_values], ignore_index=True) if not values.empty else ratio_values
+
+
+def get_entity_display_name(level, entity, max_length=30):
+    """Get a short display name for a rollup entity."""
+    if level == 'institution':
+        name = metadata.get_institution_name(entity)
+        return name if len(name) <= max_length else name[:max_length - 1] + '…'
+    return entity
+
+
+def get_region_colors():
+    """Get a stable color per region."""
+    return {
+        region: config.CHART_COLORS[i % len(config.CHART_COLORS)]
+        for i, region in enumerate(config.BANK_REGIONS)
+    }
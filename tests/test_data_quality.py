@@ -0,0 +1,56 @@
+"""Quality report accumulated over batches."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import config, data_quality
+
+
+@pytest.fixture
+def frame():
+    """Rows with known duplicates: the first 300 rows repeat with other amounts."""
+    rng = np.random.default_rng(0)
+    rows = 5_000
+    df = pd.DataFrame({
+        'NSA': pd.Categorical(rng.choice(['AT', 'DE', 'FR'], rows)),
+        'Item': np.arange(rows, dtype='int64'),
+        'Period': rng.choice(np.array([202409, 202412], dtype='int32'), rows),
+        'Label': rng.choice(['Loans', 'Deposits'], rows),
+        'Amount': rng.gamma(2.0, 5000.0, rows).astype('float32'),
+    })
+    return pd.concat([df, df.iloc[:300].assign(Amount=1.0)], ignore_index=True)
+
+
+def _report(df, batch_rows):
+    accumulator = data_quality.QualityAccumulator(('NSA', 'Period', 'Label', 'Amount'))
+    for start in range(0, len(df), batch_rows):
+        accumulator.update(df.iloc[start:start + batch_rows])
+    return accumulator.finish()
+
+
+@pytest.mark.parametrize('partitions', [1, 7, 256])
+def test_batched_report_matches_whole_frame(frame, monkeypatch, partitions):
+    monkeypatch.setattr(config, 'QUALITY_KEY_PARTITIONS', partitions)
+    report = _report(frame, batch_rows=700)
+
+    assert report == data_quality.build_quality_report(frame, ('NSA', 'Period', 'Label', 'Amount'))
+    assert report['duplicate_rows'] == int(frame.drop(columns='Amount').duplicated().sum()) == 300
+    assert report['summary']['unique_banks'] == 3
+    assert report['columns']['Item']['unique'] == 5_000
+
+
+def test_float_measures_are_not_counted(frame):
+    report = _report(frame, batch_rows=1_000)
+    assert report['columns']['Amount']['unique'] is None
+    assert report['columns']['Amount']['nulls'] == 0
+
+
+def test_spilled_hashes_are_removed(frame):
+    accumulator = data_quality.QualityAccumulator()
+    accumulator.update(frame)
+    spill_dir = Path(accumulator._spill_dir.name)
+    assert any(spill_dir.iterdir())
+    accumulator.finish()
+    assert not spill_dir.exists()
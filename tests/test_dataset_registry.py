@@ -0,0 +1,81 @@
+"""Single-flight loading in the dataset registry."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmark import synthetic_data
+from src import data_loader
+from src.dataset_registry import DatasetRegistry, DatasetSpec
+
+CALLERS = 16
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """A fresh registry, used by data_loader, with one synthetic dataset."""
+    path = tmp_path / 'synthetic.csv'
+    df = synthetic_data(1_000)
+    df.assign(Period=df['Period'].dt.strftime('%Y%m')).to_csv(path, index=False)
+
+    registry = DatasetRegistry()
+    registry.register(DatasetSpec(name='synthetic', title='Synthetic', path=str(path),
+                                  required_columns=('NSA', 'Period', 'Item', 'Amount')))
+    monkeypatch.setattr(data_loader, 'registry', registry)
+    return registry
+
+
+def _load_concurrently(name):
+    """Call load_data from CALLERS threads released at the same moment."""
+    barrier = threading.Barrier(CALLERS)
+
+    def load():
+        barrier.wait()
+        return data_loader.load_data(name)
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        return [future.result() for future in [pool.submit(load) for _ in range(CALLERS)]]
+
+
+def test_concurrent_callers_share_one_parse(registry, monkeypatch):
+    parse = data_loader._read_dataset
+    calls = []
+
+    def counting_parse(spec):
+        calls.append(spec.name)
+        # Hold the parse open so every caller arrives while it is in flight
+        time.sleep(0.2)
+        return parse(spec)
+
+    monkeypatch.setattr(data_loader, '_read_dataset', counting_parse)
+    frames = _load_concurrently('synthetic')
+
+    assert calls == ['synthetic']
+    assert all(df is frames[0] for df in frames)
+    assert len(frames[0]) == 1_000
+    assert registry.version_of(frames[0]) is not None
+
+    # Later callers get the loaded frame without parsing again
+    assert data_loader.load_data('synthetic') is frames[0]
+    assert calls == ['synthetic']
+
+
+def test_failed_parse_is_shared_and_retried(registry, monkeypatch):
+    calls = []
+
+    def failing_parse(spec):
+        calls.append(spec.name)
+        time.sleep(0.2)
+        raise ValueError("corrupt file")
+
+    monkeypatch.setattr(data_loader, '_read_dataset', failing_parse)
+    monkeypatch.setattr(data_loader.st, 'error', lambda message: None)
+
+    assert _load_concurrently('synthetic') == [None] * CALLERS
+    assert calls == ['synthetic']
+
+    # A failed load is not cached; the next caller parses again
+    assert data_loader.load_data('synthetic') is None
+    assert calls == ['synthetic'] * 2
+    assert not registry.is_loaded('synthetic')
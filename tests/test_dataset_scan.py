@@ -0,0 +1,97 @@
+"""Whole-file summaries and exports stay within a fixed memory budget."""
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src import dataset_scan
+
+if not sys.platform.startswith('linux'):
+    pytest.skip("peak memory is read from Linux /proc", allow_module_level=True)
+
+ROWS = 2_000_000
+BATCH_ROWS = 10_000
+# Peak memory growth allowed for a scan; loading the whole file takes several times more
+MEMORY_BUDGET = 80 * 1024 * 1024
+
+ROOT = Path(__file__).resolve().parents[1]
+
+OPERATIONS = {
+    'summary': "dataset_scan.scan_summary(path)",
+    'count': "dataset_scan.count_rows(path, ['B01'])",
+    'csv': "dataset_scan.export_csv(path).close()",
+    'excel': "dataset_scan.export_excel(path, ['B01']).close()",
+}
+
+
+@pytest.fixture(scope='module')
+def dataset_file(tmp_path_factory):
+    """A tr_cre-shaped Parquet file with Period in the converted yyyymm format."""
+    rng = np.random.default_rng(0)
+    banks = pa.array([f"B{i:02d}" for i in range(26)])
+    labels = pa.array([f"Metric {i}" for i in range(89)])
+    table = pa.table({
+        'NSA': banks.take(rng.integers(0, len(banks), ROWS)),
+        'Item': rng.integers(2520501, 2520501 + len(labels), ROWS),
+        'Period': rng.choice(np.array([202409, 202412, 202503, 202506], dtype='int32'), ROWS),
+        'Label': labels.take(rng.integers(0, len(labels), ROWS)),
+        'Amount': rng.gamma(2.0, 5000.0, ROWS).astype('float32'),
+    })
+    path = tmp_path_factory.mktemp('scan') / 'dataset.parquet'
+    pq.write_table(table, path)
+    return path
+
+
+def _peak_growth(path, statement):
+    """Run a statement in a fresh interpreter and return its peak memory growth in bytes."""
+    # VmHWM is the peak resident size of this interpreter alone (ru_maxrss would include the forked parent)
+    script = textwrap.dedent(f"""
+        import re
+        import pandas as pd
+        import pyarrow.parquet as pq
+        from src import config, dataset_scan
+
+        def peak():
+            with open('/proc/self/status') as status:
+                return int(re.search(r'VmHWM:\\s+(\\d+) kB', status.read()).group(1)) * 1024
+
+        config.SCAN_BATCH_ROWS = {BATCH_ROWS}
+        path = {str(path)!r}
+        pq.read_metadata(path)
+        before = peak()
+        {statement}
+        print(peak() - before)
+    """)
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return int(result.stdout.split()[-1])
+
+
+def test_full_read_exceeds_budget(dataset_file):
+    # Otherwise the budget would not show that the scans avoid loading the file
+    assert _peak_growth(dataset_file, "pd.read_parquet(path)") > 2 * MEMORY_BUDGET
+
+
+@pytest.mark.parametrize('operation', OPERATIONS)
+def test_scan_stays_within_budget(dataset_file, operation):
+    assert _peak_growth(dataset_file, OPERATIONS[operation]) < MEMORY_BUDGET
+
+
+def test_scan_results(dataset_file, monkeypatch):
+    monkeypatch.setattr(dataset_scan.config, 'SCAN_BATCH_ROWS', BATCH_ROWS)
+    table = pq.read_table(dataset_file, columns=['NSA', 'Amount'])
+    bank_rows = int(np.count_nonzero(table['NSA'].to_numpy(zero_copy_only=False) == 'B01'))
+
+    summary = dataset_scan.scan_summary(dataset_file)
+    assert summary['total_rows'] == ROWS
+    assert (summary['unique_banks'], summary['unique_periods'], summary['unique_metrics']) == (26, 4, 89)
+    assert summary['total_amount'] == pytest.approx(float(np.sum(table['Amount'].to_numpy(), dtype='float64')))
+
+    assert dataset_scan.count_rows(dataset_file) == ROWS
+    assert dataset_scan.get_row_count(dataset_file, ['B01']) == bank_rows
+    with dataset_scan.export_csv(dataset_file, ['B01']) as output:
+        assert sum(1 for _ in output) == bank_rows + 1
@@ -0,0 +1,66 @@
+"""Parity of the DuckDB query backend with the pandas implementation."""
+import pytest
+
+from benchmark import same_result, synthetic_data
+from src import config, data_processor, duckdb_backend
+
+if not duckdb_backend.is_available():
+    pytest.skip("duckdb is not installed", allow_module_level=True)
+
+FUNCTIONS = [
+    'prepare_comparison_data',
+    'prepare_metric_comparison_data',
+    'calculate_period_change',
+    'get_top_banks',
+    'calculate_statistics',
+    'prepare_heatmap_data',
+]
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    """Synthetic tr_cre-shaped frame and the same data as a legacy-schema Parquet file."""
+    df = synthetic_data(20_000)
+    path = tmp_path_factory.mktemp('parity') / 'synthetic.parquet'
+    df.assign(Period=df['Period'].dt.strftime('%Y%m').astype('int32')).to_parquet(path, index=False)
+    return df, path
+
+
+@pytest.fixture(autouse=True)
+def pandas_backend(monkeypatch):
+    monkeypatch.setattr(config, 'QUERY_BACKEND', 'pandas')
+
+
+def _cases(df):
+    # A subset of the (categorical) banks, so unobserved categories must not leak into results
+    banks = list(df['NSA'].cat.categories[:6])
+    items = sorted(df['Item'].unique().tolist())[:5]
+    period = df['Period'].max()
+    return {
+        'prepare_comparison_data': (banks, items[0]),
+        'prepare_metric_comparison_data': (banks[0], items),
+        'calculate_period_change': (banks, items[0]),
+        'get_top_banks': (items[0], period),
+        'calculate_statistics': (banks, items[0], period),
+        'prepare_heatmap_data': (banks, items, period),
+    }
+
+
+@pytest.mark.parametrize('name', FUNCTIONS)
+@pytest.mark.parametrize('source', ['parquet', 'frame'])
+def test_duckdb_matches_pandas(synthetic, name, source):
+    df, path = synthetic
+    args = _cases(df)[name]
+
+    expected = getattr(data_processor, name)(df, *args)
+    actual = getattr(duckdb_backend, name)(path if source == 'parquet' else df, *args)
+
+    assert same_result(expected, actual)
+
+
+def test_selection_is_limited_to_selected_banks(synthetic):
+    df, _ = synthetic
+    banks, item, period = _cases(df)['calculate_statistics']
+
+    assert data_processor.calculate_statistics(df, banks, item, period)['count'] == len(banks)
+    assert list(data_processor.prepare_heatmap_data(df, banks, [item], period).columns) == banks